@@ -1,63 +1,361 @@
 # budget_tracker.py
 import json
+import math
+import os
 import datetime
-
+import sys
+import time
+from functools import reduce
+from ledger_columns import LedgerColumns, numpy_available
+from ledger_dates import DateIndex, add_to_totals, add_totals, empty_totals
+import statement_import
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The repository folder, for pbl_common.
+from pbl_common.serializers import JsonSerializer, write_text_atomic
+from pbl_common import profiling  # --profile: where a menu action spends its time
+from pbl_common.records import Record
+from ledger_storage import LedgerStorage, find_position, journal_path, manifest_path, month_of
+import ledger_report
+
+## The transactions are stored per month in budget_data/ (see ledger_storage.py); DATA_FILE names that folder.
 DATA_FILE = "budget_data.json"
+TOTALS_FILE = "budget_totals.json"  # Running totals, so balance and summary don't re-add everything.
 
 
-def load_transactions():
-    """Loads transactions from the JSON file."""
-    try:
-        with open(DATA_FILE, 'r') as file:
-            return json.load(file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+class Transaction(Record):
+    """ One transaction in memory: slots instead of a dict, one shared string per type and category.
+    Works like the transaction dict it was made from (see pbl_common/records.py). """
 
+    FIELDS = ("id", "date", "type", "amount", "category", "description")
+    __slots__ = FIELDS
+    INTERNED = frozenset({"type", "category"})
 
-def save_transactions():
-    """Saves the current list of transactions to the JSON file."""
-    with open(DATA_FILE, 'w') as file:
-        json.dump(transactions, file, indent=4)
+
+storage = LedgerStorage(DATA_FILE)  # Monthly snapshots + journal, see ledger_storage.py.
+
+
+def ask(prompt):
+    """input() - timed as its own phase, so waiting for the user doesn't look like work when profiling."""
+    with profiling.phase("input"):
+        return input(prompt)
+
+
+def load_transactions():
+    """Loads every transaction (every month's file, plus the journal)."""
+    return storage.load()
 
 
-transactions = load_transactions()
+def save_transactions():
+    """Saves every transaction (a full snapshot - single changes go to the journal)."""
+    storage.save(ledger.transactions)
+
+
+class Ledger:
+    """ The transactions, read from DATA_FILE the first time they're used (not when this module is imported).
+        One ledger is shared by the command line menu and the GUI, so the file is only parsed once. """
+
+    def __init__(self):
+        self._transactions = None
+        self.load_count = 0  # How many times the data file was parsed.
+        self.load_seconds = 0.0
+
+    @property
+    def transactions(self):
+        if self._transactions is None:
+            start = time.perf_counter()
+            self._transactions = load_transactions()
+            self.load_seconds = time.perf_counter() - start
+            self.load_count += 1
+        return self._transactions
+
+    @property
+    def loaded(self):
+        return self._transactions is not None
+
+    def use_records(self):
+        """ Turns the transactions into compact Transaction records - for the GUI, which keeps them for as long
+        as the window is open. About half the memory each; the menu doesn't pay the conversion. """
+        with profiling.phase("scan"):
+            self.transactions[:] = map(Transaction.from_dict, self.transactions)
+
+    # Changes - each one is a single journal append
+    def position_of(self, transaction_id):
+        """Where the transaction with this id is in the list, or None."""
+        return find_position(self.transactions, transaction_id)
+
+    def add(self, transaction):
+        """Gives a new transaction its id and stores it. Returns the stored transaction."""
+        transaction = {"id": storage.take_id(), **transaction}
+        self.transactions.append(transaction)
+        storage.append({"op": "add", "transaction": transaction})
+        self.compact_if_needed()
+        return transaction
+
+    def add_many(self, new_transactions):
+        """Stores a batch of new transactions with one journal append (all-or-nothing). Returns them with ids."""
+        stored = [{"id": storage.take_id(), **transaction} for transaction in new_transactions]
+        self.transactions.extend(stored)
+        storage.append({"op": "batch", "records": [{"op": "add", "transaction": transaction} for transaction in stored]})
+        self.compact_if_needed()
+        return stored
+
+    def edited(self, transaction):
+        """Call after changing a transaction in place."""
+        storage.append({"op": "edit", "transaction": dict(transaction)})
+        self.compact_if_needed()
+
+    def delete(self, position):
+        """Removes the transaction at a position; on disk it's a tombstone. Returns the removed transaction."""
+        removed = self.transactions.pop(position)
+        storage.append({"op": "delete", "id": removed["id"], "month": month_of(removed)})
+        self.compact_if_needed()
+        return removed
+
+    def compact_if_needed(self):
+        if storage.needs_compaction(len(self.transactions)):
+            storage.compact_in_background(self.transactions)
+
+
+ledger = Ledger()
+
+
+def __getattr__(name):
+    """Keeps `Budget_Tracker.transactions` working for code written before the ledger loaded lazily."""
+    if name == "transactions":
+        return ledger.transactions
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+columns = None  # Column arrays (NumPy) for fast totals - built the first time they're needed.
+
+
+def get_columns():
+    """Returns the column copy of the transactions, or None when NumPy isn't installed."""
+    global columns
+    if columns is None and numpy_available():
+        with profiling.phase("scan"):
+            columns = LedgerColumns(ledger.transactions)
+    return columns
+
+
+# Running totals
+## {"income": 0.0, "expenses": 0.0, "categories": {name: [total, number of expenses]}}
+## Every add/edit/delete changes them by the difference, so reading them is O(1) / O(categories).
+## They're saved with the data file's size and modification time, so a data file that was
+## changed behind our back (or a crash between the two saves) is noticed and they're rebuilt.
+totals = None  # Loaded the first time they're needed.
+
+
+def data_file_signature():
+    """Size and modification time of the manifest and the journal."""
+    signature = []
+    for path in (manifest_path(DATA_FILE), journal_path(DATA_FILE)):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            signature += [None, None]
+            continue
+        signature += [stat.st_size, stat.st_mtime_ns]
+    return signature if signature[0] is not None else None
+
+
+def compute_totals(use_months=True):
+    """Adds up every transaction from scratch (or the stored per-month totals, when the ledger isn't loaded)."""
+    with profiling.phase("scan"):
+        return _compute_totals(use_months)
+
+
+def _compute_totals(use_months):
+    if use_months and not ledger.loaded:
+        months = storage.month_totals()  # Per-month totals from the manifest - only changed months are read.
+        if months is not None:
+            return reduce(add_totals, months.values(), empty_totals())
+
+    ledger_columns = get_columns()
+    if ledger_columns is not None:  # Vectorized sums over the columns.
+        total_income, total_expenses = ledger_columns.totals()
+        categories = {name: [total, count] for name, (total, count) in ledger_columns.category_totals_and_counts().items()}
+        return {"income": total_income, "expenses": total_expenses, "categories": categories}
+
+    income_amounts = []
+    expense_amounts = []
+    categories = {}
+    for transaction in ledger.transactions:
+        if transaction["type"] == "income":
+            income_amounts.append(transaction["amount"])
+        else:
+            expense_amounts.append(transaction["amount"])
+            entry = categories.setdefault(transaction["category"], [0.0, 0])
+            entry[0] += transaction["amount"]
+            entry[1] += 1
+    return {"income": math.fsum(income_amounts), "expenses": math.fsum(expense_amounts), "categories": categories}
+
+
+def save_totals():
+    """Saves the running totals, tagged with the data file they belong to."""
+    with profiling.phase("serialize"):
+        text = json.dumps({"data_file": data_file_signature(), **totals}, indent=4)
+    write_text_atomic(TOTALS_FILE, text)
+
+
+def get_totals():
+    """Returns the running totals - from budget_totals.json if it still matches the data, otherwise rebuilt."""
+    global totals
+    if totals is None:
+        try:
+            with profiling.phase("parse"), open(TOTALS_FILE, 'r') as file:
+                saved = json.load(file)
+                profiling.count_bytes("read", file.tell())
+        except (FileNotFoundError, json.JSONDecodeError):
+            saved = {}
+        if saved.get("data_file") == data_file_signature() and "income" in saved:
+            del saved["data_file"]
+            totals = saved
+        else:
+            totals = compute_totals()
+            save_totals()
+    return totals
+
+
+def change_totals(transaction, sign):
+    """Adds (sign=1) or removes (sign=-1) one transaction from the running totals."""
+    add_to_totals(get_totals(), transaction, sign)
+
+
+def verify_totals():
+    """Checks the running totals against a full recount and rebuilds them if they're off."""
+    global totals
+    print("\n---- Verify Totals ----")
+    current = get_totals()
+    fresh = compute_totals(use_months=False)
+    problems = []
+    for name in ("income", "expenses"):
+        if abs(current[name] - fresh[name]) > 0.005:
+            problems.append(f"{name}: stored €{current[name]:.2f}, actual €{fresh[name]:.2f}")
+    for category in set(current["categories"]) | set(fresh["categories"]):
+        stored = current["categories"].get(category, [0.0, 0])
+        actual = fresh["categories"].get(category, [0.0, 0])
+        if abs(stored[0] - actual[0]) > 0.005 or stored[1] != actual[1]:
+            problems.append(f"{category}: stored €{stored[0]:.2f}, actual €{actual[0]:.2f}")
+    totals = fresh  # A recount also clears any rounding drift.
+    save_totals()
+    if problems:
+        print("❌ The totals were out of date and have been rebuilt:")
+        for problem in problems:
+            print(f" - {problem}")
+    else:
+        print("✅ Totals are correct.")
+
+
+# Date index
+## Transactions sorted by date with monthly/weekly rollups (see ledger_dates.py).
+date_index = None  # Built the first time a date question is asked.
+
+
+def get_date_index():
+    global date_index
+    if date_index is None:
+        with profiling.phase("sort"):
+            date_index = DateIndex(ledger.transactions)
+    return date_index
+
+
+def range_totals(start_date, end_date):
+    """Totals for the transactions from start_date to end_date (both 'YYYY-MM-DD', both days included)."""
+    start = datetime.datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.datetime.strptime(end_date, "%Y-%m-%d") + datetime.timedelta(days=1)
+    if not ledger.loaded:  # Only the months at the two ends of the range are read.
+        period_totals = storage.range_totals(start, end)
+        if period_totals is not None:
+            return period_totals
+    return get_date_index().range_totals(start, end)
+
+
+def rollups(period="month"):
+    """Totals per month ('2025-07') or per ISO week ('2025-W29'), oldest first."""
+    periods = None
+    if period == "month" and not ledger.loaded:
+        periods = storage.month_totals()  # Straight from the manifest, for the months the journal didn't change.
+    if periods is None:
+        index = get_date_index()
+        periods = index.monthly if period == "month" else index.weekly
+    return {key: periods[key] for key in sorted(periods)
+            if periods[key]["categories"] or abs(periods[key]["income"]) >= 0.005}
+
+
+# Keeping the columns, totals and date index in step with the transactions list
+def record_added(transaction):
+    if columns is not None:
+        columns.append(transaction)
+    if date_index is not None:
+        date_index.add(transaction)
+    change_totals(transaction, 1)
+
+
+def record_edited(index, old_transaction, transaction):
+    if columns is not None:
+        columns.update(index, transaction)
+    if date_index is not None:
+        date_index.edited(old_transaction, transaction)
+    change_totals(old_transaction, -1)
+    change_totals(transaction, 1)
+
+
+def record_deleted(index, transaction):
+    if columns is not None:
+        columns.delete(index)
+    if date_index is not None:
+        date_index.remove(transaction)
+    change_totals(transaction, -1)
+
+
+# Changes that keep the totals in step (the caller saves them with save_totals())
+def record_transaction(transaction_type, amount, description, category=None):
+    """Adds an income or expense dated now and keeps the totals in step. Returns the stored transaction."""
+    get_totals()  # Loaded before the change, so a rebuild doesn't count it twice.
+    transaction = {
+        "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
+        "type": transaction_type,
+        "amount": amount
+    }
+    if transaction_type == "expense":
+        transaction["category"] = category
+    transaction["description"] = description
+    transaction = ledger.add(transaction)
+    record_added(transaction)
+    return transaction
+
+
+def remove_transaction(position):
+    """Deletes the transaction at a position and keeps the totals in step. Returns the removed transaction."""
+    get_totals()  # Loaded before the change, so a rebuild doesn't count it twice.
+    removed = ledger.delete(position)
+    record_deleted(position, removed)
+    return removed
 
 
 def add_income():
-    """Adds a new income and saves all transactions."""
+    """Adds a new income and saves it."""
     print("---- ADD INCOME ----")
     try:
-        amount = float(input("Enter the income amount: "))
-        description = input("Enter the description: (Ex.: 'Paycheck')")
-        transaction = {
-            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "type": "income",
-            "amount": amount,
-            "description": description
-        }
-        transactions.append(transaction)
-        save_transactions()
+        amount = float(ask("Enter the income amount: "))
+        description = ask("Enter the description: (Ex.: 'Paycheck')")
+        record_transaction("income", amount, description)
+        save_totals()
         print("✅ Income added successfully!")
     except ValueError:
         print("❌ Invalid amount. Please enter a number.")
 
 
 def add_expense():
-    """Adds a new expense and saves all transactions."""
+    """Adds a new expense and saves it."""
     print("---- ADD EXPENSE ----")
     try:
-        amount = float(input("Enter the expense amount: "))
-        category = input("Enter the expense category: (Ex.: 'Living Expenses') ")
-        description = input("Enter the expense description: ")
-        transaction = {
-            "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M"),
-            "type": "expense",
-            "amount": amount,
-            "category": category,
-            "description": description
-        }
-        transactions.append(transaction)
-        save_transactions()
+        amount = float(ask("Enter the expense amount: "))
+        category = ask("Enter the expense category: (Ex.: 'Living Expenses') ")
+        description = ask("Enter the expense description: ")
+        record_transaction("expense", amount, description, category)
+        save_totals()
         print("✅ Expense added successfully!")
     except ValueError:
         print("❌ Invalid amount. Please enter a number.")
@@ -66,40 +364,43 @@ def add_expense():
 def view_transactions():
     """Displays all recorded transactions with an ID."""
     print("\n---- All transactions ----")
-    if not transactions:
+    if not ledger.transactions:
         print("No transactions found!")
         return
-    for i, transaction in enumerate(transactions):
-        transaction_id = i + 1
-        if transaction["type"] == "income":
-            print(
-                f"#{transaction_id}: [{transaction['date']}] ➕ Income: €{transaction['amount']:.2f}; ({transaction['description']})")
-        else:
-            print(
-                f"#{transaction_id}: [{transaction['date']}] ➖ Expense: €{transaction['amount']:.2f}; [{transaction['category']}]; ({transaction['description']})")
+    with profiling.phase("render"):
+        for transaction in ledger.transactions:
+            transaction_id = transaction["id"]
+            if transaction["type"] == "income":
+                print(
+                    f"#{transaction_id}: [{transaction['date']}] ➕ Income: €{transaction['amount']:.2f}; ({transaction['description']})")
+            else:
+                print(
+                    f"#{transaction_id}: [{transaction['date']}] ➖ Expense: €{transaction['amount']:.2f}; [{transaction['category']}]; ({transaction['description']})")
 
 
 def edit_transaction():
     """Edits an existing transaction selected by the user."""
     print("\n---- Edit Transaction ----")
     view_transactions()
-    if not transactions:
+    if not ledger.transactions:
         return
 
     try:
-        id_to_edit = int(input("Enter the ID of the transaction to edit: "))
-        index_to_edit = id_to_edit - 1
+        id_to_edit = int(ask("Enter the ID of the transaction to edit: "))
+        index_to_edit = ledger.position_of(id_to_edit)
 
-        if not (0 <= index_to_edit < len(transactions)):
+        if index_to_edit is None:
             print("❌ Invalid ID. Please try again.")
             return
 
-        transaction = transactions[index_to_edit]
+        get_totals()  # Loaded before the change, so a rebuild doesn't count it twice.
+        transaction = ledger.transactions[index_to_edit]
+        old_transaction = dict(transaction)  # Remembered so the totals can take the old values out.
 
         print("\nEnter new details. Press Enter to keep the current value.")
 
         current_amount = transaction['amount']
-        new_amount_str = input(f"Enter new amount (current: {current_amount}): ")
+        new_amount_str = ask(f"Enter new amount (current: {current_amount}): ")
         if new_amount_str:
             try:
                 transaction['amount'] = float(new_amount_str)
@@ -107,17 +408,19 @@ def edit_transaction():
                 print("❌ Invalid amount. Keeping the current value.")
 
         current_description = transaction['description']
-        new_description = input(f"Enter new description (current: '{current_description}'): ")
+        new_description = ask(f"Enter new description (current: '{current_description}'): ")
         if new_description:
             transaction['description'] = new_description
 
         if transaction['type'] == 'expense':
             current_category = transaction['category']
-            new_category = input(f"Enter new category (current: '{current_category}'): ")
+            new_category = ask(f"Enter new category (current: '{current_category}'): ")
             if new_category:
                 transaction['category'] = new_category
 
-        save_transactions()
+        record_edited(index_to_edit, old_transaction, transaction)
+        ledger.edited(transaction)
+        save_totals()
         print("✅ Transaction updated successfully!")
 
     except ValueError:
@@ -128,14 +431,14 @@ def delete_transaction():
     """Deletes a transaction selected by the user."""
     print("\n---- Delete Transaction ----")
     view_transactions()
-    if not transactions:
+    if not ledger.transactions:
         return
     try:
-        id_to_delete = int(input("Enter the ID of the transaction to delete: "))
-        index_to_delete = id_to_delete - 1
-        if 0 <= index_to_delete < len(transactions):
-            transactions.pop(index_to_delete)
-            save_transactions()
+        id_to_delete = int(ask("Enter the ID of the transaction to delete: "))
+        index_to_delete = ledger.position_of(id_to_delete)
+        if index_to_delete is not None:
+            remove_transaction(index_to_delete)
+            save_totals()
             print("✅ Transaction deleted successfully!")
         else:
             print("❌ Invalid ID. Please try again.")
@@ -145,13 +448,9 @@ def delete_transaction():
 
 def calculate_balance():
     """Calculates and displays the total balance."""
-    total_income = 0
-    total_expenses = 0
-    for transaction in transactions:
-        if transaction["type"] == "income":
-            total_income += transaction["amount"]
-        else:
-            total_expenses += transaction["amount"]
+    current = get_totals()  # Running totals - no need to go through every transaction.
+    total_income = current["income"]
+    total_expenses = current["expenses"]
     balance = total_income - total_expenses
     print("\n---- Current Balance ----")
     print(f"Total income: €{total_income:.2f}")
@@ -162,47 +461,158 @@ def calculate_balance():
 def view_summary():
     """Displays a summary of expenses by category."""
     print("\n---- Expenses by category ----")
-    category_totals = {}
-    for transaction in transactions:
-        if transaction["type"] == "expense":
-            category = transaction["category"]
-            amount = transaction["amount"]
-            category_totals[category] = category_totals.get(category, 0) + amount
+    category_totals = get_totals()["categories"]
     if not category_totals:
         print("No expenses to summarize yet.")
         return
-    for category, total in category_totals.items():
+    for category, (total, _) in category_totals.items():
         print(f" - {category}: €{total:.2f}")
 
 
+def print_totals(title, period_totals):
+    """Prints income, expenses, balance and the expenses per category for one period."""
+    balance = period_totals["income"] - period_totals["expenses"]
+    print(f"\n---- {title} ----")
+    print(f"Total income: €{period_totals['income']:.2f}")
+    print(f"Total expenses: €{period_totals['expenses']:.2f}")
+    print(f"Net Balance: €{balance:.2f}")
+    for category, (total, _) in period_totals["categories"].items():
+        print(f" - {category}: €{total:.2f}")
+
+
+def view_date_range():
+    """Displays the balance and expenses by category between two dates."""
+    print("\n---- Balance for a date range ----")
+    start_date = ask("Enter the start date (YYYY-MM-DD): ")
+    end_date = ask("Enter the end date (YYYY-MM-DD): ")
+    try:
+        period_totals = range_totals(start_date, end_date)
+    except ValueError:
+        print("❌ Invalid date. Please use the format YYYY-MM-DD.")
+        return
+    print_totals(f"{start_date} to {end_date}", period_totals)
+
+
+def view_rollups():
+    """Displays the totals for every month or every week."""
+    print("\n---- Monthly / Weekly totals ----")
+    choice = ask("Show totals per (m)onth or per (w)eek? ").strip().lower()
+    if choice not in ("m", "w"):
+        print("❌ Please enter 'm' or 'w'.")
+        return
+    periods = rollups("month" if choice == "m" else "week")
+    if not periods:
+        print("No transactions found!")
+        return
+    for key, period_totals in periods.items():
+        print_totals(key, period_totals)
+
+
+def import_statement_file(path, mapping, dry_run=False):
+    """Streams a CSV/OFX statement into the transactions. Returns the report.
+
+    Each batch of BATCH_SIZE new transactions is saved as soon as it's read (all of it or none of it), so a
+    statement that fails half way keeps the batches before the failure. The totals are saved at the end.
+    """
+    report = statement_import.new_report()
+    if not dry_run:
+        get_totals()  # Loaded before the change, so a rebuild doesn't count it twice.
+    start = time.perf_counter()
+    rows = statement_import.read_statement(path, mapping)
+    fresh = statement_import.new_transactions(rows, ledger.transactions, report)
+    try:
+        with profiling.phase("scan"):  # Reading and checking the rows is streamed, so it counts here too.
+            for batch in statement_import.batches(fresh, statement_import.BATCH_SIZE):
+                if dry_run:
+                    report["imported"] += len(batch)
+                    continue
+                saving = time.perf_counter()
+                stored = ledger.add_many(batch)  # One journal append per batch.
+                report["save_seconds"] += time.perf_counter() - saving
+                report["imported"] += len(batch)
+                for transaction in stored:
+                    record_added(transaction)
+    except (OSError, ValueError):  # A broken file: the batches before it stay saved.
+        if report["imported"] and not dry_run:
+            print(f"ℹ️ The import stopped, but the {report['imported']} transaction(s) before that were already saved.")
+        raise
+    finally:
+        if report["imported"] and not dry_run:
+            saving = time.perf_counter()
+            save_totals()
+            report["save_seconds"] += time.perf_counter() - saving
+    report["seconds"] = time.perf_counter() - start
+    statement_import.print_report(report, dry_run)
+    return report
+
+
+def import_statement():
+    """Asks for a bank statement file and imports it."""
+    print("\n---- Import bank statement ----")
+    path = ask("Enter the statement file (.csv or .ofx): ").strip()
+    mapping_file = ask("Enter a column mapping file (press Enter for the default columns): ").strip()
+    dry_run = ask("Dry run only (nothing is saved)? (y/n) ").strip().lower() == "y"
+    try:
+        import_statement_file(path, statement_import.load_mapping(mapping_file or None), dry_run)
+    except FileNotFoundError as error:
+        print(f"❌ File not found: '{error.filename}'.")
+    except (ValueError, json.JSONDecodeError) as error:
+        print(f"❌ {error}")
+
+
+def export_transactions():
+    """Writes every transaction to one JSON file (the ledger itself is stored per month)."""
+    print("\n---- Export to JSON ----")
+    path = ask("Enter the file to export to (press Enter for 'budget_export.json'): ").strip() or "budget_export.json"
+    JsonSerializer().save(path, ledger.transactions)
+    print(f"✅ Exported {len(ledger.transactions)} transaction(s) to '{path}'.")
+
+
+def consolidated_report():
+    """Adds up many ledgers (e.g. one per account) into one report, in parallel."""
+    print("\n---- Consolidated report ----")
+    patterns = ask("Enter the ledger folders or globs, separated by spaces (e.g. accounts/): ").split()
+    if not patterns:
+        print("❌ No ledgers given.")
+        return
+    ledger_report.print_report(ledger_report.consolidated_report(patterns))
+
+
+MENU = [
+    ("Add Income", add_income),
+    ("Add Expense", add_expense),
+    ("View All Transactions", view_transactions),
+    ("Edit a Transaction", edit_transaction),
+    ("Delete a Transaction", delete_transaction),
+    ("Show Current Balance", calculate_balance),
+    ("View summary by category", view_summary),
+    ("Verify totals", verify_totals),
+    ("Balance for a date range", view_date_range),
+    ("Monthly / weekly totals", view_rollups),
+    ("Import bank statement (CSV/OFX)", import_statement),
+    ("Export to JSON", export_transactions),
+    ("Consolidated report (many ledgers)", consolidated_report),
+]
+EXIT_CHOICE = str(len(MENU) + 1)
+
+
 def main():
     """Main Application loop."""
+    choices = {str(number): entry for number, entry in enumerate(MENU, start=1)}
     while True:
         print("\n---- Budget Tracker Menu ----")
-        print("1. Add Income")
-        print("2. Add Expense")
-        print("3. View All Transactions")
-        print("4. Edit a Transaction")
-        print("5. Delete a Transaction")
-        print("6. Show Current Balance")
-        print("7. View summary by category")
-        print("8. Exit")
-        choice = input("Enter your choice: ")
-        if choice == '1':
-            add_income()
-        elif choice == '2':
-            add_expense()
-        elif choice == '3':
-            view_transactions()
-        elif choice == '4':
-            edit_transaction()
-        elif choice == '5':
-            delete_transaction()
-        elif choice == '6':
-            calculate_balance()
-        elif choice == '7':
-            view_summary()
-        elif choice == '8':
+        for number, (label, _) in choices.items():
+            print(f"{number}. {label}")
+        print(f"{EXIT_CHOICE}. Exit")
+        choice = ask("Enter your choice: ")
+        if choice in choices:
+            label, menu_action = choices[choice]
+            with profiling.action(label):  # One report per menu action with --profile.
+                menu_action()
+        elif choice == EXIT_CHOICE:
+            storage.wait()  # Let a background compaction finish...
+            if totals is not None:
+                save_totals()  # ...and tag the totals with the files it left.
             print("Thank you for using Budget Tracker. Bye 👋")
             break
         else:
@@ -210,4 +620,10 @@ def main():
 
 
 if __name__ == "__main__":
+    ## --profile[=json] reports where each menu action spends its time (see pbl_common/profiling.py).
+    try:
+        profiling.configure_from(sys.argv[1:])
+    except ValueError as error:
+        print(f"❌ {error}")
+        sys.exit(1)
     main()
\ No newline at end of file
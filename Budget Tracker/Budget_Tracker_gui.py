@@ -1,7 +1,36 @@
 # Budget_Tracker_gui.py
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk
+from tkinter import messagebox
 import Budget_Tracker as logic
+from ledger_storage import find_position
+
+# How the table stays fast with a big ledger:
+## - The Treeview only holds the rows on screen plus BUFFER_ROWS above and below. Scrolling inside
+##   the buffer is just Tk scrolling; scrolling past it swaps the few rows that changed.
+## - Every row's item id is its transaction's id, so a row that's still on screen after scrolling is kept.
+##   The ledger is kept in id order, so an id finds its transaction with a binary search.
+## - Sorting by a column builds a sorted index (a list of (value, id)) once, in memory;
+##   the table then reads its rows from that index instead of re-inserting everything.
+## - The ledger is read on a background thread; the window shows up straight away.
+
+VISIBLE_ROWS = 32
+BUFFER_ROWS = 32
+POLL_MS = 30  # How often the Tk loop checks whether the background load has finished.
+COLUMNS = ('ID', 'Date', 'Type', 'Category', 'Description', 'Amount')
+
+
+def column_value(transaction, column):
+    """The value a column shows (and sorts by) for one transaction."""
+    if column == 'ID':
+        return transaction['id']
+    if column == 'Category':
+        return transaction.get('category', 'N/A')
+    if column == 'Amount':
+        return transaction['amount']
+    return transaction[column.lower()]
 
 
 class BudgetApp:
@@ -11,13 +40,20 @@ class BudgetApp:
         self.root.title("PBL: Budget Tracker")
         self.root.geometry("1280x800")
 
-        self.transactions = logic.load_transactions()
+        self.transactions = []  # Shared with Budget_Tracker once the background load is done.
+        self.sort_column = 'ID'
+        self.sort_descending = False
+        self.sort_indexes = {}  # column -> sorted [(value, id)], built the first time it's used
+        self.first_row = 0  # Position (in the current sort order) of the top row on screen.
+        self.window = (0, 0)  # Positions of the rows that are in the Treeview right now.
+        self.loaded = queue.Queue()  # (transactions, error) from the background load.
 
         self.main_frame = ttk.Frame(self.root, padding="10")
         self.main_frame.pack(fill=tk.BOTH, expand=True)
 
         self.create_widgets()
-        self.populate_transactions_view()
+        threading.Thread(target=self.load_in_background, daemon=True).start()
+        self.root.after(POLL_MS, self.poll_loaded)
 
     def create_widgets(self):
         """ Create widgets and arrange them """
@@ -34,15 +70,14 @@ class BudgetApp:
         )
         title_label.pack()
 
-        columns = ('ID', 'Date', 'Type', 'Category', 'Description', 'Amount')
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings')
+        self.status_label = ttk.Label(top_frame, text="Loading transactions...")
+        self.status_label.pack()
+
+        self.tree = ttk.Treeview(tree_frame, columns=COLUMNS, show='headings', height=VISIBLE_ROWS)
 
-        self.tree.heading('ID', text='ID')
-        self.tree.heading('Date', text='Date')
-        self.tree.heading('Type', text='Type')
-        self.tree.heading('Category', text='Category')
-        self.tree.heading('Description', text='Description')
-        self.tree.heading('Amount', text='Amount (€)')
+        for column in COLUMNS:
+            text = 'Amount (€)' if column == 'Amount' else column
+            self.tree.heading(column, text=text, command=lambda column=column: self.sort_by(column))
 
         self.tree.column('ID', width=50, stretch=tk.NO)
         self.tree.column('Date', width=160, stretch=tk.NO)
@@ -51,30 +86,116 @@ class BudgetApp:
         self.tree.column('Description', width=400)
         self.tree.column('Amount', width=120, anchor=tk.E)
 
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
 
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", self.on_mouse_wheel)
+        self.tree.bind("<Button-5>", self.on_mouse_wheel)
+
+    # Loading
+    def load_in_background(self):
+        try:
+            transactions = logic.ledger.transactions  # The one parse of the data file.
+            logic.ledger.use_records()  # Kept for as long as the window is open.
+        except Exception as error:  # Shown by the Tk thread - Tk can't be used from this one.
+            self.loaded.put((None, error))
+            return
+        self.loaded.put((transactions, None))
+
+    def poll_loaded(self):
+        try:
+            transactions, error = self.loaded.get_nowait()
+        except queue.Empty:
+            self.root.after(POLL_MS, self.poll_loaded)
+            return
+        if error is not None:
+            self.status_label.config(text="The transactions couldn't be loaded.")
+            messagebox.showerror("❌ Error", f"Couldn't load the transactions: {error}")
+            return
+        self.transactions = transactions
+        self.status_label.config(text=f"{len(transactions)} transactions")
+        self.populate_transactions_view()
 
+    # Rows in the current sort order
+    def sorted_index(self, column):
+        if column not in self.sort_indexes:
+            self.sort_indexes[column] = sorted(
+                (column_value(transaction, column), transaction['id']) for transaction in self.transactions)
+        return self.sort_indexes[column]
+
+    def row_at(self, position):
+        """Id of the transaction shown at a position, in the current sort order."""
+        if self.sort_descending:
+            position = len(self.transactions) - 1 - position
+        if self.sort_column == 'ID':  # The ledger is already in ID order.
+            return self.transactions[position]['id']
+        return self.sorted_index(self.sort_column)[position][1]
+
+    def row_values(self, transaction_id):
+        transaction = self.transactions[find_position(self.transactions, transaction_id)]
+        return (transaction_id, transaction['date'], transaction['type'], transaction.get('category', 'N/A'),
+                transaction['description'], f"{transaction['amount']:.2f}")
+
+    # Virtual scrolling
     def populate_transactions_view(self):
-        """ Clears Treeview and fills it with current data """
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        for i, transaction in enumerate(self.transactions):
-            transaction_id = i + 1
-            amount_str = f"{transaction['amount']:.2f}"
-            category = transaction.get('category', 'N/A')
-
-            self.tree.insert(
-                '',
-                tk.END,
-                values=(transaction_id, transaction['date'], transaction['type'], category, transaction['description'],
-                        amount_str)
-            )
-
-
+        """ Drops every row from the Treeview and fills in the ones around the scroll position """
+        self.tree.delete(*self.tree.get_children())
+        self.window = (0, 0)
+        self.scroll_to(self.first_row)
+
+    def scroll_to(self, position):
+        total = len(self.transactions)
+        self.first_row = max(0, min(position, total - VISIBLE_ROWS))
+        start, end = self.window
+        if not (start <= self.first_row and min(self.first_row + VISIBLE_ROWS, total) <= end):
+            self.materialize(max(0, self.first_row - BUFFER_ROWS), min(total, self.first_row + VISIBLE_ROWS + BUFFER_ROWS))
+        start, end = self.window
+        if end > start:
+            self.tree.yview_moveto((self.first_row - start) / (end - start))
+        if total <= VISIBLE_ROWS:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first_row / total, (self.first_row + VISIBLE_ROWS) / total)
+
+    def materialize(self, start, end):
+        """ Makes the Treeview hold exactly the rows at positions start..end-1, reusing the ones it already has """
+        wanted = [self.row_at(position) for position in range(start, end)]
+        wanted_ids = {str(transaction_id) for transaction_id in wanted}
+        stale = [item for item in self.tree.get_children() if item not in wanted_ids]
+        if stale:
+            self.tree.delete(*stale)
+        for index, transaction_id in enumerate(wanted):
+            if self.tree.exists(str(transaction_id)):
+                self.tree.move(str(transaction_id), '', index)
+            else:
+                self.tree.insert('', index, iid=str(transaction_id), values=self.row_values(transaction_id))
+        self.window = (start, end)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.transactions)))
+        elif action == "scroll":
+            step = VISIBLE_ROWS if unit == "pages" else 1
+            self.scroll_to(self.first_row + int(amount) * step)
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or event.delta > 0:  # Button-4 is "wheel up" on Linux.
+            self.scroll_to(self.first_row - 3)
+        else:
+            self.scroll_to(self.first_row + 3)
+        return "break"  # The Treeview only holds a few rows, so it mustn't scroll on its own.
+
+    # Sorting
+    def sort_by(self, column):
+        """ Header click: sort by that column, or flip the order if it's already sorted by it """
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column, self.sort_descending = column, False
+        self.first_row = 0
+        self.populate_transactions_view()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,108 @@
+# ledger_columns.py
+## An optional column-by-column copy of the transactions, for fast totals.
+## Instead of a list of dictionaries (one per transaction), each field gets one NumPy array:
+##   amount      -> float64
+##   is_income   -> int8 (1 = income, 0 = expense)
+##   category    -> int32 code into category_names (-1 = no category, e.g. income)
+##   date        -> datetime64[m] (minutes, same precision as "%Y-%m-%d %H:%M")
+## Totals then become a few vectorized sums instead of a Python loop with a branch per row.
+## NumPy is optional: without it, Budget_Tracker just uses its normal loops.
+## It's imported the first time the columns are needed, not on import (it takes longer to import than the tracker).
+np = None
+numpy_checked = False
+
+INITIAL_CAPACITY = 1024
+
+
+def numpy_available():
+    global np, numpy_checked
+    if not numpy_checked:
+        numpy_checked = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np is not None
+
+
+def to_datetime64(date_text):
+    """'2025-07-21 18:10' -> numpy.datetime64('2025-07-21T18:10')."""
+    return np.datetime64(date_text.replace(" ", "T"), "m")
+
+
+class LedgerColumns:
+    """ Column arrays for a list of transactions, kept in step with every add, edit and delete. """
+
+    def __init__(self, transactions):
+        self.category_codes = {}  # category name -> code
+        self.category_names = []  # code -> category name
+        self.size = len(transactions)
+        capacity = max(INITIAL_CAPACITY, self.size)
+        self.amount = np.zeros(capacity, dtype=np.float64)
+        self.is_income = np.zeros(capacity, dtype=np.int8)
+        self.category = np.full(capacity, -1, dtype=np.int32)
+        self.date = np.zeros(capacity, dtype="datetime64[m]")
+        if transactions:
+            n = self.size
+            self.amount[:n] = [transaction["amount"] for transaction in transactions]
+            self.is_income[:n] = [transaction["type"] == "income" for transaction in transactions]
+            self.category[:n] = [self._code(transaction) for transaction in transactions]
+            self.date[:n] = np.array([transaction["date"].replace(" ", "T") for transaction in transactions],
+                                     dtype="datetime64[m]")
+
+    def _code(self, transaction):
+        """Dictionary-encodes a category: each distinct name is stored once and rows keep a small int."""
+        if transaction["type"] == "income":
+            return -1
+        name = transaction["category"]
+        code = self.category_codes.get(name)
+        if code is None:
+            code = self.category_codes[name] = len(self.category_names)
+            self.category_names.append(name)
+        return code
+
+    def _set_row(self, index, transaction):
+        self.amount[index] = transaction["amount"]
+        self.is_income[index] = transaction["type"] == "income"
+        self.category[index] = self._code(transaction)
+        self.date[index] = to_datetime64(transaction["date"])
+
+    # Keeping in step with the transactions list
+    def append(self, transaction):
+        if self.size == len(self.amount):  # Full - double the room (amortized O(1) appends).
+            capacity = 2 * len(self.amount)
+            self.amount = np.resize(self.amount, capacity)
+            self.is_income = np.resize(self.is_income, capacity)
+            self.category = np.resize(self.category, capacity)
+            self.date = np.resize(self.date, capacity)
+        self._set_row(self.size, transaction)
+        self.size += 1
+
+    def update(self, index, transaction):
+        self._set_row(index, transaction)
+
+    def delete(self, index):
+        """Removes a row, shifting the later rows up (like list.pop, but a single memory move per column)."""
+        end = self.size
+        for column in (self.amount, self.is_income, self.category, self.date):
+            column[index:end - 1] = column[index + 1:end]
+        self.size -= 1
+
+    # Totals
+    def totals(self):
+        """Returns (total income, total expenses)."""
+        amount = self.amount[:self.size]
+        income_mask = self.is_income[:self.size].astype(bool)
+        return float(amount[income_mask].sum()), float(amount[~income_mask].sum())
+
+    def category_totals_and_counts(self):
+        """Returns {category: (total expenses, number of expenses)}, in the order the categories were first seen."""
+        codes = self.category[:self.size]
+        expense_mask = codes >= 0
+        length = len(self.category_names)
+        totals = np.bincount(codes[expense_mask], weights=self.amount[:self.size][expense_mask], minlength=length)
+        counts = np.bincount(codes[expense_mask], minlength=length)
+        return {name: (float(totals[code]), int(counts[code]))
+                for code, name in enumerate(self.category_names) if counts[code]}
+
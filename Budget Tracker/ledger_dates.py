@@ -0,0 +1,108 @@
+# ledger_dates.py
+## A sorted index of the transactions by date, plus monthly and weekly rollups.
+## Dates are parsed once when a transaction enters the index. After that:
+##   - a date range is two bisects + the k transactions inside it (O(log N + k))
+##   - monthly/weekly totals per category are kept up to date on every add, edit and delete
+import bisect
+import datetime
+
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def parse_date(date_text):
+    return datetime.datetime.strptime(date_text, DATE_FORMAT)
+
+
+def month_key(date):
+    return f"{date.year}-{date.month:02d}"
+
+
+def week_key(date):
+    year, week, _ = date.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def empty_totals():
+    return {"income": 0.0, "expenses": 0.0, "categories": {}}
+
+
+def add_to_totals(totals, transaction, sign=1):
+    """Adds (sign=1) or removes (sign=-1) one transaction from a totals dictionary."""
+    amount = sign * transaction["amount"]
+    if transaction["type"] == "income":
+        totals["income"] += amount
+        return
+    totals["expenses"] += amount
+    category = transaction["category"]
+    entry = totals["categories"].setdefault(category, [0.0, 0])
+    entry[0] += amount
+    entry[1] += sign
+    if entry[1] == 0:
+        del totals["categories"][category]
+
+
+def add_totals(totals, other):
+    """Adds a whole totals dictionary (e.g. one month's) to another one."""
+    totals["income"] += other["income"]
+    totals["expenses"] += other["expenses"]
+    for category, (amount, count) in other["categories"].items():
+        entry = totals["categories"].setdefault(category, [0.0, 0])
+        entry[0] += amount
+        entry[1] += count
+    return totals
+
+
+class DateIndex:
+    """ Transactions sorted by date (keys and entries are parallel lists). """
+
+    def __init__(self, transactions):
+        pairs = sorted(((parse_date(transaction["date"]), transaction) for transaction in transactions),
+                       key=lambda pair: pair[0])
+        self.keys = [date for date, _ in pairs]
+        self.entries = [transaction for _, transaction in pairs]
+        self.monthly = {}  # "2025-07" -> totals
+        self.weekly = {}  # "2025-W29" -> totals
+        for date, transaction in pairs:
+            self._change_rollups(date, transaction, 1)
+
+    def _change_rollups(self, date, transaction, sign):
+        add_to_totals(self.monthly.setdefault(month_key(date), empty_totals()), transaction, sign)
+        add_to_totals(self.weekly.setdefault(week_key(date), empty_totals()), transaction, sign)
+
+    # Keeping in step with the transactions list
+    def add(self, transaction):
+        date = parse_date(transaction["date"])
+        position = bisect.bisect_right(self.keys, date)  # After any transactions at the same minute.
+        self.keys.insert(position, date)
+        self.entries.insert(position, transaction)
+        self._change_rollups(date, transaction, 1)
+
+    def remove(self, transaction):
+        date = parse_date(transaction["date"])
+        start = bisect.bisect_left(self.keys, date)
+        end = bisect.bisect_right(self.keys, date)
+        for position in range(start, end):  # Only the transactions from the same minute are checked.
+            if self.entries[position] is transaction:
+                del self.keys[position]
+                del self.entries[position]
+                self._change_rollups(date, transaction, -1)
+                return
+
+    def edited(self, old_transaction, transaction):
+        """The date doesn't change when editing, so only the rollups need updating."""
+        date = parse_date(transaction["date"])
+        self._change_rollups(date, old_transaction, -1)
+        self._change_rollups(date, transaction, 1)
+
+    # Queries
+    def between(self, start, end):
+        """Transactions with start <= date < end (both datetimes)."""
+        first = bisect.bisect_left(self.keys, start)
+        last = bisect.bisect_left(self.keys, end)
+        return self.entries[first:last]
+
+    def range_totals(self, start, end):
+        totals = empty_totals()
+        for transaction in self.between(start, end):
+            add_to_totals(totals, transaction)
+        return totals
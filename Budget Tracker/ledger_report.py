@@ -0,0 +1,146 @@
+# ledger_report.py
+## One report over many budget ledgers (one per account or household), e.g. every ledger in a folder.
+## Each ledger is added up in its own worker process and only its totals come back, which are then merged:
+##   - the ledgers are read in parallel, so the wall time goes down with the number of cores;
+##   - a worker holds one ledger at a time, so memory stays at about one ledger per worker.
+## Nothing is changed on disk: old single-file ledgers are read as they are (not split into months).
+## A ledger stored per month is mostly answered from its manifest (see ledger_storage.py); the work
+## that is left - the months its journal changed, or a whole single-file ledger - is what the workers share.
+##
+## Usage: python ledger_report.py <folder or glob> [more folders/globs...] [--workers N]
+##   e.g. python ledger_report.py accounts/          (every ledger in accounts/ and its subfolders' manifests)
+##        python ledger_report.py "accounts/*.json"
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The repository folder, for pbl_common.
+from pbl_common import profiling
+from ledger_dates import empty_totals, add_totals
+from ledger_storage import (LedgerStorage, MANIFEST_FILE, apply_change, group_by_month, partition_dir,
+                            partition_totals)
+
+LEDGER_EXTENSIONS = (".json",)
+
+
+def find_ledgers(patterns):
+    """The data files of the ledgers in some folders / globs, sorted and without repeats.
+
+    A ledger is a folder with a manifest.json (budget_data/ -> budget_data.json) or a single-file
+    ledger (a .json file). Files that turn out not to be ledgers are skipped when they're read.
+    """
+    ledgers = set()
+    for pattern in patterns:
+        paths = [pattern] if os.path.isdir(pattern) else glob.glob(pattern)
+        if not paths and os.path.isfile(os.path.join(partition_dir(pattern), MANIFEST_FILE)):
+            paths = [pattern]  # budget_data.json after it was split into months: only budget_data/ is left.
+        for path in paths:
+            if os.path.isdir(path):
+                ledgers.update(ledgers_in_folder(path))
+            elif path.endswith(LEDGER_EXTENSIONS):
+                ledgers.add(path)
+    return sorted({os.path.normpath(ledger) for ledger in ledgers})  # 'a.json' and './a.json' are one ledger.
+
+
+def ledgers_in_folder(folder):
+    if os.path.isfile(os.path.join(folder, MANIFEST_FILE)):
+        yield data_file_for(folder)
+        return
+    for name in sorted(os.listdir(folder)):
+        path = os.path.join(folder, name)
+        if os.path.isfile(os.path.join(path, MANIFEST_FILE)):
+            yield data_file_for(path)
+        elif name.endswith(LEDGER_EXTENSIONS) and os.path.isfile(path) \
+                and not os.path.isfile(os.path.join(partition_dir(path), MANIFEST_FILE)):
+            yield path  # A single-file ledger (if it has been split into months, the folder counts instead).
+
+
+def data_file_for(folder):
+    """budget_data/ -> budget_data.json: the name LedgerStorage knows the ledger by."""
+    return folder.rstrip(os.sep) + ".json"
+
+
+# In the worker processes
+def ledger_totals(data_file):
+    """Adds up one ledger without changing any file. Returns its totals (or why it was skipped)."""
+    start = time.perf_counter()
+    storage = LedgerStorage(data_file)
+    try:
+        months = storage.month_totals()
+        if months is None:  # A single-file ledger: read it as it is.
+            transactions = storage.read_legacy()
+            if storage.legacy_file is None:
+                return {"ledger": data_file, "skipped": "not a ledger, or empty"}
+            for record in storage.read_journal():
+                apply_change(transactions, record)
+            months = {month: partition_totals(group) for month, group in group_by_month(transactions).items()}
+    except OSError as error:
+        return {"ledger": data_file, "skipped": f"couldn't be read ({error})"}
+    except (ValueError, KeyError, TypeError, AttributeError):  # e.g. budget_totals.json, which is a dict.
+        return {"ledger": data_file, "skipped": "not a list of transactions"}
+    return {"ledger": data_file, "totals": reduce(add_totals, months.values(), empty_totals()),
+            "seconds": time.perf_counter() - start}
+
+
+# In the main process
+def consolidated_report(patterns, workers=None):
+    """Adds up every ledger found in patterns, in parallel. Returns the per-ledger results and the merged totals."""
+    ledgers = find_ledgers(patterns)
+    workers = min(workers or os.cpu_count() or 1, max(1, len(ledgers)))
+    with profiling.phase("scan"):
+        if workers == 1:  # Not worth starting processes for.
+            results = [ledger_totals(ledger) for ledger in ledgers]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                ## chunksize=1: a worker takes the next ledger only when it's done with the last one.
+                results = list(pool.map(ledger_totals, ledgers, chunksize=1))
+    merged = reduce(add_totals, (result["totals"] for result in results if "totals" in result), empty_totals())
+    return {"ledgers": results, "totals": merged, "workers": workers}
+
+
+def print_report(report):
+    with profiling.phase("render"):
+        print("\n---- Consolidated report ----")
+        if not report["ledgers"]:
+            print("No ledgers found.")
+            return
+        for result in report["ledgers"]:
+            if "skipped" in result:
+                print(f" - {result['ledger']}: skipped ({result['skipped']})")
+                continue
+            totals = result["totals"]
+            print(f" - {result['ledger']}: income €{totals['income']:.2f}, expenses €{totals['expenses']:.2f}, "
+                  f"balance €{totals['income'] - totals['expenses']:.2f}")
+        merged = report["totals"]
+        print(f"\nTotal income: €{merged['income']:.2f}")
+        print(f"Total expenses: €{merged['expenses']:.2f}")
+        print(f"Net Balance: €{merged['income'] - merged['expenses']:.2f}")
+        print("Expenses by category:")
+        for category, (total, _) in sorted(merged["categories"].items(), key=lambda item: -item[1][0]):
+            print(f" - {category}: €{total:.2f}")
+        print(f"({len(report['ledgers'])} ledger(s), {report['workers']} worker(s))")
+
+
+if __name__ == "__main__":
+    try:
+        arguments = profiling.configure_from(sys.argv[1:])
+    except ValueError as error:
+        print(f"❌ {error}")
+        sys.exit(1)
+    workers = None
+    if "--workers" in arguments:
+        position = arguments.index("--workers")
+        try:
+            workers = int(arguments[position + 1])
+        except (IndexError, ValueError):
+            print("❌ --workers needs a number.")
+            sys.exit(1)
+        del arguments[position:position + 2]
+    if not arguments:
+        print("Expected: python ledger_report.py <folder or glob> [more...] [--workers N]")
+        sys.exit(1)
+    with profiling.action("consolidated report"):
+        print_report(consolidated_report(arguments, workers))
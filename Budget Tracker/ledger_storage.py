@@ -0,0 +1,424 @@
+# ledger_storage.py
+## How the budget is stored:
+##   - budget_data/ holds one snapshot file per month (2025-07.3.json) and manifest.json.
+##     The manifest lists the months, and for each one its file, how many transactions it holds and
+##     their totals (income, expenses, expenses per category). It also keeps the id counter.
+##   - Every add, edit and delete after that is one line appended to budget_data.journal.
+##     A delete is just a tombstone ({"op": "delete", "id": 7, "month": "2025-07"}) - nothing is rewritten.
+##   - Loading everything = read every month + replay the journal.
+##   - Once the journal is a quarter the size of the ledger, a background thread writes new files for
+##     the months the journal touched (normally just the current one) and drops the journal lines they
+##     now hold (compaction). Past months are left alone, and the menu keeps working meanwhile.
+##   - Totals, monthly totals and date ranges only open the months they need: a month the journal
+##     doesn't touch is answered straight from the manifest.
+##   - Every file is read through pbl_common/parse_cache.py, so one that hasn't changed isn't parsed twice.
+##   - A month is written to a new file (the number is the snapshot generation) before the manifest
+##     is swapped in, so a crash leaves either the old snapshot or the new one, never a mix.
+## Every transaction has a stable id, handed out in increasing order and never reused. The list of
+## transactions stays in id order, so it is its own id -> position index (a binary search away).
+import datetime
+import json
+import os
+import threading
+from operator import itemgetter
+
+from pbl_common import journal
+from pbl_common.serializers import JsonSerializer, write_text_atomic
+from ledger_dates import empty_totals, add_to_totals, add_totals
+from pbl_common import parse_cache, profiling
+
+JOURNAL_SUFFIX = ".journal"
+META_SUFFIX = ".meta.json"  # The id counter of ledgers saved before the monthly files (it's in the manifest now).
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+MIN_COMPACT_RECORDS = 1000  # Never compact for fewer journal records than this.
+
+
+def journal_path(data_file):
+    root, _ = os.path.splitext(data_file)
+    return root + JOURNAL_SUFFIX
+
+
+def meta_path(data_file):
+    root, _ = os.path.splitext(data_file)
+    return root + META_SUFFIX
+
+
+def partition_dir(data_file):
+    """The folder with the monthly files: budget_data.json -> budget_data/"""
+    root, _ = os.path.splitext(data_file)
+    return root
+
+
+def manifest_path(data_file):
+    return os.path.join(partition_dir(data_file), MANIFEST_FILE)
+
+
+def month_of(transaction):
+    """'2025-07' for a transaction dated '2025-07-14 09:30'."""
+    return transaction["date"][:7]
+
+
+def months_between(first, last):
+    """Every month from the one holding first to the one holding last, as '2025-07' keys."""
+    year, month = first.year, first.month
+    while (year, month) <= (last.year, last.month):
+        yield f"{year}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def starts_month(moment):
+    return moment.day == 1 and moment.time() == datetime.time()
+
+
+def search(transactions, transaction_id):
+    """Binary search over the id-ordered list: where transaction_id is (or would go)."""
+    low, high = 0, len(transactions)
+    while low < high:
+        middle = (low + high) // 2
+        if transactions[middle]["id"] < transaction_id:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def find_position(transactions, transaction_id):
+    """Position of the transaction with this id, or None."""
+    position = search(transactions, transaction_id)
+    if position < len(transactions) and transactions[position]["id"] == transaction_id:
+        return position
+    return None
+
+
+def flatten_records(records):
+    """Yields one record per change. A batch (e.g. a statement import) is stored as one record so it is saved all-or-nothing."""
+    for record in records:
+        if record["op"] == "batch":
+            yield from record["records"]
+        else:
+            yield record
+
+
+def record_month(record):
+    """The month a journal record changes (None for a tombstone written before tombstones had one)."""
+    if record["op"] == "delete":
+        return record.get("month")
+    return month_of(record["transaction"])
+
+
+def apply_change(transactions, record):
+    """Applies one journal record to the id-ordered list.
+
+    Every record sets a final value (a whole transaction, or its absence), so replaying a record
+    twice is harmless. That is what makes a crash half way through a compaction safe.
+    """
+    if record["op"] == "delete":
+        position = find_position(transactions, record["id"])
+        if position is not None:
+            del transactions[position]
+        return
+    transaction = record["transaction"]
+    position = search(transactions, transaction["id"])
+    if position < len(transactions) and transactions[position]["id"] == transaction["id"]:
+        transactions[position] = transaction
+    elif record["op"] == "add":
+        transactions.insert(position, transaction)  # Nearly always at the end.
+
+
+def partition_totals(transactions):
+    totals = empty_totals()
+    for transaction in transactions:
+        add_to_totals(totals, transaction)
+    return totals
+
+
+def group_by_month(transactions, months=None):
+    """{month: [transactions]}, only for the given months if there are any (each list keeps id order)."""
+    if months is None:
+        groups = {}
+        for transaction in transactions:
+            groups.setdefault(month_of(transaction), []).append(transaction)
+        return groups
+    groups = {month: [] for month in months}
+    for transaction in transactions:
+        group = groups.get(month_of(transaction))
+        if group is not None:
+            group.append(transaction)
+    return groups
+
+
+def parse_manifest(path):
+    with profiling.phase("parse"), open(path, "r") as f:
+        manifest = json.load(f)
+        profiling.count_bytes("read", f.tell())
+    return manifest
+
+
+class LedgerStorage:
+    """ The monthly snapshots + journal of one data file. """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.manifest = None  # As of the last read_manifest() (which checks the file for changes).
+        self.next_id = 1
+        self.journal_records = 0
+        self.dirty_months = set()  # Months with changes that are only in the journal so far.
+        self.legacy_file = None  # A single-file snapshot from before the monthly files, once it's been read.
+        self.lock = threading.Lock()  # Journal appends vs. the end of a background compaction.
+        self.compaction = None  # The background compaction thread, while one runs.
+
+    # Reading
+    def read_manifest(self):
+        """The manifest, or None before the first snapshot. Parsed again only when the file has changed."""
+        path = manifest_path(self.data_file)
+        try:
+            self.manifest = parse_cache.load(path, parse_manifest)  # Shared: nothing changes a manifest in place.
+        except FileNotFoundError:
+            self.manifest = None
+        except ValueError:
+            print(f"⚠️ Couldn't read '{path}'.")
+            self.manifest = None
+        return self.manifest
+
+    def read_partition(self, month):
+        """The transactions of one month as of the last snapshot (in id order)."""
+        entry = self.manifest["partitions"].get(month)
+        if entry is None:
+            return []
+        path = os.path.join(partition_dir(self.data_file), entry["file"])
+        try:
+            return JsonSerializer().load(path)
+        except (FileNotFoundError, ValueError):  # Missing, or damaged (bad JSON).
+            print(f"⚠️ Couldn't read '{path}'.")
+            return []
+
+    def read_legacy(self):
+        """Reads a single-file snapshot (budget_data.json) from before the monthly files."""
+        try:
+            transactions = JsonSerializer().load(self.data_file)
+        except FileNotFoundError:
+            return []
+        except ValueError:  # A damaged data file (bad JSON).
+            print(f"⚠️ Couldn't read '{self.data_file}'.")
+            return []
+        self.legacy_file = self.data_file
+
+        if any("id" not in transaction for transaction in transactions):
+            ## Saved before transactions had ids: number them in file order (the ids they used to show).
+            next_id = max((transaction.get("id", 0) for transaction in transactions), default=0) + 1
+            for position, transaction in enumerate(transactions):
+                if "id" not in transaction:
+                    transactions[position] = {"id": next_id, **transaction}
+                    next_id += 1
+            transactions.sort(key=itemgetter("id"))
+        try:
+            with open(meta_path(self.data_file), "r") as f:
+                self.next_id = json.load(f).get("next_id", 1)
+        except (FileNotFoundError, ValueError):
+            pass
+        return transactions
+
+    def load(self):
+        """ Reads every month (or an old single-file snapshot, which is then split up) and replays the journal. """
+        manifest = self.read_manifest()
+        if manifest is None:
+            transactions = self.read_legacy()
+        else:
+            transactions = []
+            for month in sorted(manifest["partitions"]):
+                transactions.extend(self.read_partition(month))
+            with profiling.phase("sort"):
+                transactions.sort(key=itemgetter("id"))  # The months are nearly in id order already, so this is quick.
+            self.next_id = manifest["next_id"]
+
+        records = list(flatten_records(journal.read_records(journal_path(self.data_file))))
+        highest_id = transactions[-1]["id"] if transactions else 0
+        with profiling.phase("scan"):  # Replaying the journal.
+            for record in records:
+                month = record_month(record)
+                if month is None:  # An old tombstone: the month is the deleted transaction's.
+                    position = find_position(transactions, record["id"])
+                    month = month_of(transactions[position]) if position is not None else None
+                if month is not None:
+                    self.dirty_months.add(month)
+                apply_change(transactions, record)
+                if record["op"] == "add":
+                    highest_id = max(highest_id, record["transaction"]["id"])
+        self.journal_records = len(records)
+        self.next_id = max(self.next_id, highest_id + 1)
+        if self.legacy_file is not None:  # Split it into months.
+            self.save(transactions)
+        return transactions
+
+    def read_journal(self):
+        return list(flatten_records(journal.read_records(journal_path(self.data_file))))
+
+    def read_months(self, months, records):
+        """The transactions of some months (journal records applied, in id order), without reading the others."""
+        transactions = []
+        for month in sorted(months):
+            transactions.extend(self.read_partition(month))
+        transactions.sort(key=itemgetter("id"))
+        for record in records:
+            if record["op"] == "delete" or record_month(record) in months:
+                apply_change(transactions, record)
+        return transactions
+
+    def month_totals(self, months=None):
+        """{month: totals} for the given months (default: every month), or None before the first snapshot.
+
+        A month the journal doesn't touch comes from the manifest; only the months it changed are read.
+        """
+        with profiling.phase("scan"):
+            return self._month_totals(months)
+
+    def _month_totals(self, months):
+        manifest = self.read_manifest()
+        if manifest is None:
+            return None
+        records = self.read_journal()
+        touched = {record_month(record) for record in records}
+        if None in touched:  # An old tombstone without its month: it could be in any of them.
+            touched = set(manifest["partitions"])
+        known = set(manifest["partitions"]) | touched
+        wanted = known if months is None else known & set(months)
+
+        result = {month: add_totals(empty_totals(), manifest["partitions"][month]["totals"])
+                  for month in wanted - touched}
+        changed = wanted & touched
+        for month, transactions in group_by_month(self.read_months(changed, records), changed).items():
+            if transactions:
+                result[month] = partition_totals(transactions)
+        return result
+
+    def range_totals(self, start, end):
+        """Totals for start <= date < end (datetimes), or None before the first snapshot.
+
+        Whole months inside the range come from month_totals(); only a month cut by the
+        start or the end of the range is read, to pick out the days that count.
+        """
+        with profiling.phase("scan"):
+            return self._range_totals(start, end)
+
+    def _range_totals(self, start, end):
+        if self.read_manifest() is None:
+            return None
+        if end <= start:
+            return empty_totals()
+        months = list(months_between(start, end - datetime.timedelta(minutes=1)))
+        cut = set()
+        if not starts_month(start):
+            cut.add(months[0])
+        if not starts_month(end):
+            cut.add(months[-1])
+        totals = empty_totals()
+        for period_totals in self.month_totals(set(months) - cut).values():
+            add_totals(totals, period_totals)
+        start_text, end_text = start.strftime("%Y-%m-%d %H:%M"), end.strftime("%Y-%m-%d %H:%M")
+        for transaction in self.read_months(cut, self.read_journal()):
+            if start_text <= transaction["date"] < end_text:  # This date format sorts like the dates do.
+                add_to_totals(totals, transaction)
+        return totals
+
+    def take_id(self):
+        transaction_id = self.next_id
+        self.next_id += 1
+        return transaction_id
+
+    # Saving
+    def append(self, record):
+        """ Appends one change to the journal (one small write, whatever the size of the ledger). """
+        with self.lock:
+            journal.append_records(journal_path(self.data_file), [record])
+            changes = list(flatten_records([record]))
+            self.journal_records += len(changes)  # A batch counts once per change it holds.
+            self.dirty_months.update(record_month(change) for change in changes)
+
+    def needs_compaction(self, transaction_count):
+        return self.journal_records >= max(MIN_COMPACT_RECORDS, transaction_count // 4)
+
+    def write_manifest(self, manifest):
+        path = manifest_path(self.data_file)
+        write_text_atomic(path, json.dumps(manifest, indent=4))
+        parse_cache.store(path, manifest)
+
+    def write_partitions(self, groups, replace_all=False):
+        """Writes new files for the months in groups ((month, transactions) pairs) and swaps in a new manifest.
+
+        The other months keep their files, unless replace_all. Files the new manifest no longer
+        lists are deleted once it's in place.
+        """
+        folder = partition_dir(self.data_file)
+        os.makedirs(folder, exist_ok=True)
+        old = self.read_manifest() or {"generation": 0, "partitions": {}}
+        generation = old["generation"] + 1
+        partitions = {} if replace_all else dict(old["partitions"])
+        for month, transactions in groups:
+            if not transactions:
+                partitions.pop(month, None)
+                continue
+            name = f"{month}.{generation}.json"
+            JsonSerializer().save(os.path.join(folder, name), transactions)
+            partitions[month] = {"file": name, "count": len(transactions), "totals": partition_totals(transactions)}
+        manifest = {"version": MANIFEST_VERSION, "generation": generation,
+                    "next_id": self.next_id, "partitions": dict(sorted(partitions.items()))}
+        self.write_manifest(manifest)
+        self.manifest = manifest
+
+        in_use = {entry["file"] for entry in partitions.values()}
+        for entry in old["partitions"].values():
+            if entry["file"] not in in_use:
+                try:
+                    os.remove(os.path.join(folder, entry["file"]))
+                except FileNotFoundError:
+                    pass
+
+    def save(self, transactions):
+        """ Writes a full snapshot (every month) and empties the journal. """
+        self.wait()
+        with self.lock:
+            with profiling.phase("scan"):
+                groups = group_by_month(transactions)
+            self.write_partitions(groups.items(), replace_all=True)
+            with open(journal_path(self.data_file), "w"):
+                pass
+            self.journal_records = 0
+            self.dirty_months = set()
+        if self.legacy_file is not None:
+            ## The single file is now split into months. It stays where it is, untouched, as a backup:
+            ## once the manifest exists, load() never reads it again.
+            if os.path.exists(meta_path(self.data_file)):
+                os.remove(meta_path(self.data_file))
+            print(f"ℹ️ '{self.legacy_file}' is now stored per month in '{partition_dir(self.data_file)}' "
+                  f"(the old file is left as it was, but no longer used).")
+            self.legacy_file = None
+
+    def compact_in_background(self, transactions):
+        """ Starts a compaction on a worker thread (unless one is already running). """
+        if self.compaction is not None and self.compaction.is_alive():
+            return
+        with self.lock:
+            path = journal_path(self.data_file)
+            offset = os.path.getsize(path) if os.path.exists(path) else 0
+            folded = self.journal_records
+            months = self.dirty_months
+            self.dirty_months = set()
+            snapshot = list(transactions)  # Later changes only reach the journal (edits replace whole records).
+        ## Not a daemon thread: Python waits for it to finish before exiting.
+        self.compaction = threading.Thread(target=self.compact, args=(snapshot, months, offset, folded))
+        self.compaction.start()
+
+    def compact(self, snapshot, months, offset, folded):
+        ## Copies of the transactions, so a month's file and its totals agree even if one is edited meanwhile.
+        self.write_partitions((month, [dict(transaction) for transaction in transactions])
+                              for month, transactions in group_by_month(snapshot, months).items())
+        with self.lock:  # Only drop what the snapshot holds - changes made meanwhile stay in the journal.
+            journal.drop_before(journal_path(self.data_file), offset)
+            self.journal_records -= folded
+
+    def wait(self):
+        """ Waits for a running background compaction. """
+        if self.compaction is not None:
+            self.compaction.join()
+            self.compaction = None
@@ -0,0 +1,188 @@
+# statement_import.py
+## Bulk import of bank statements (CSV or OFX) into the budget ledger.
+## The statement is streamed: rows are read, converted and checked one at a time by generators,
+## so a huge file never has to fit in memory. Duplicates (rows already in the ledger, e.g. from
+## importing the same statement twice) are found with a hash lookup instead of a search.
+##
+## Usage: python statement_import.py <statement.csv|statement.ofx> [--mapping mapping.json] [--dry-run]
+import csv
+import datetime
+import json
+import re
+import sys
+from collections import Counter
+from functools import lru_cache
+
+## Which CSV column holds what. Override any of these with a JSON file (--mapping).
+DEFAULT_MAPPING = {
+    "date": "Date",
+    "amount": "Amount",
+    "description": "Description",
+    "category": "Category",  # optional column
+    "type": None,  # optional column with 'income'/'expense' - without it, negative amounts are expenses
+    "date_format": "%Y-%m-%d",
+    "decimal_comma": False,  # True for amounts like 1.234,56
+    "default_category": "Uncategorized",
+    "delimiter": ",",
+}
+LEDGER_DATE_FORMAT = "%Y-%m-%d %H:%M"
+BATCH_SIZE = 10_000  # New transactions are added to the ledger this many at a time.
+OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+class ImportRowError(ValueError):
+    """A statement row that can't be turned into a transaction."""
+
+
+def load_mapping(path=None):
+    mapping = dict(DEFAULT_MAPPING)
+    if path:
+        with open(path, "r") as file:
+            mapping.update(json.load(file))
+    return mapping
+
+
+@lru_cache(maxsize=4096)  # Statements repeat the same dates a lot - parse each one once.
+def convert_date(text, date_format):
+    return datetime.datetime.strptime(text.strip(), date_format).strftime(LEDGER_DATE_FORMAT)
+
+
+def make_transaction(date, amount, description, category, kind=None):
+    """Builds a ledger transaction. The sign of the amount decides income/expense unless kind is given."""
+    kind = (kind or ("income" if amount >= 0 else "expense")).strip().lower()
+    if kind not in ("income", "expense"):
+        raise ImportRowError(f"unknown type '{kind}'")
+    if kind == "income":  # Same shape as the transactions add_transaction makes.
+        return {"date": date, "type": kind, "amount": abs(amount), "description": description}
+    return {"date": date, "type": kind, "amount": abs(amount), "category": category, "description": description}
+
+
+# Readers - each yields (line number, transaction or ImportRowError)
+def read_csv(path, mapping):
+    with open(path, "r", newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file, delimiter=mapping["delimiter"])
+        header = [name.strip().lower() for name in next(reader, [])]
+
+        def column(name, required=True):
+            wanted = mapping.get(name)
+            if wanted and wanted.lower() in header:
+                return header.index(wanted.lower())
+            if required:
+                raise ValueError(f"The statement has no '{wanted}' column (set '{name}' in the mapping).")
+            return None
+
+        date_col, amount_col, description_col = column("date"), column("amount"), column("description")
+        category_col, type_col = column("category", False), column("type", False)
+        date_format, default_category = mapping["date_format"], mapping["default_category"]
+
+        for line_number, row in enumerate(reader, start=2):
+            if not row:
+                continue
+            try:
+                amount_text = row[amount_col].strip()
+                if mapping["decimal_comma"]:
+                    amount_text = amount_text.replace(".", "").replace(",", ".")
+                category = row[category_col].strip() if category_col is not None and row[category_col].strip() \
+                    else default_category
+                yield line_number, make_transaction(
+                    convert_date(row[date_col], date_format), float(amount_text), row[description_col].strip(),
+                    category, row[type_col] if type_col is not None else None)
+            except (ValueError, IndexError) as error:
+                yield line_number, ImportRowError(str(error))
+
+
+def read_ofx(path, mapping):
+    """Reads <STMTTRN> blocks from an OFX file (both the old SGML style and the XML style)."""
+    fields = None
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        for line_number, line in enumerate(file, start=1):
+            upper = line.upper()
+            if "<STMTTRN>" in upper:
+                fields = {}
+            if fields is not None:
+                for name, value in OFX_FIELD.findall(line):
+                    fields[name.upper()] = value.strip()
+            if "</STMTTRN>" in upper and fields is not None:
+                try:
+                    posted = fields["DTPOSTED"][:12].ljust(12, "0")  # YYYYMMDDHHMM
+                    date = convert_date(posted, "%Y%m%d%H%M")
+                    description = fields.get("NAME") or fields.get("MEMO", "")
+                    yield line_number, make_transaction(date, float(fields["TRNAMT"]), description,
+                                                        mapping["default_category"])
+                except (KeyError, ValueError) as error:
+                    yield line_number, ImportRowError(f"bad transaction ({error})")
+                fields = None
+
+
+def read_statement(path, mapping):
+    if path.lower().endswith((".ofx", ".qfx")):
+        return read_ofx(path, mapping)
+    return read_csv(path, mapping)
+
+
+# Duplicates
+def transaction_key(transaction):
+    """What makes two transactions 'the same'."""
+    return (transaction["date"], transaction["type"], round(transaction["amount"], 2),
+            transaction.get("category"), transaction["description"])
+
+
+def new_transactions(rows, existing_transactions, report):
+    """Yields the rows that aren't already in the ledger.
+
+    The existing transactions are counted by key, so importing a statement twice adds nothing,
+    while two identical rows in one statement (two coffees at the same time) are both kept.
+    """
+    already_there = Counter(transaction_key(transaction) for transaction in existing_transactions)
+    for line_number, result in rows:
+        report["rows"] += 1
+        if isinstance(result, ImportRowError):
+            report["errors"].append((line_number, str(result)))
+            continue
+        key = transaction_key(result)
+        if already_there[key]:
+            already_there[key] -= 1
+            report["duplicates"] += 1
+            continue
+        yield result
+
+
+def batches(transactions, size):
+    """Groups a stream into lists of up to size items."""
+    batch = []
+    for transaction in transactions:
+        batch.append(transaction)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def new_report():
+    return {"rows": 0, "imported": 0, "duplicates": 0, "errors": [], "seconds": 0.0, "save_seconds": 0.0}
+
+
+def print_report(report, dry_run):
+    rate = report["rows"] / report["seconds"] if report["seconds"] else 0
+    print(f"\n---- Import {'(dry run) ' if dry_run else ''}report ----")
+    print(f"Rows read: {report['rows']} ({rate:,.0f} rows/s)")
+    print(f"{'Would import' if dry_run else 'Imported'}: {report['imported']}")
+    if report["save_seconds"]:
+        print(f"Saved in {report['save_seconds']:.2f} s")
+    print(f"Duplicates skipped: {report['duplicates']}")
+    print(f"Rows with errors: {len(report['errors'])}")
+    for line_number, error in report["errors"][:10]:
+        print(f" - line {line_number}: {error}")
+    if len(report["errors"]) > 10:
+        print(f" - ... and {len(report['errors']) - 10} more")
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    if not arguments:
+        print("Expected: python statement_import.py <statement.csv|statement.ofx> [--mapping mapping.json] [--dry-run]")
+        sys.exit(1)
+    mapping_file = arguments[arguments.index("--mapping") + 1] if "--mapping" in arguments else None
+    import Budget_Tracker
+    Budget_Tracker.import_statement_file(arguments[0], load_mapping(mapping_file), "--dry-run" in arguments)
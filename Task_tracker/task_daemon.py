@@ -0,0 +1,245 @@
+import io
+import json
+import os
+import signal
+import socket  # Unix domain sockets - a local "phone line" between two processes
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+
+# Task tracker daemon.
+## A background process that loads the tasks once and keeps them in memory.
+## task_tracker.py (with TASK_DAEMON=1) and task_gui.py send it commands over a Unix socket
+## next to todolist.json, so they skip the load (and the full save) on every command.
+## Writes are held back (write-behind) and synced to disk together once things go quiet.
+##
+## Protocol: one JSON line per request, one JSON line back.
+### request:  {"args": ["add", "Buy Milk"], "display": true, "lines": null}
+### response: {"ok": true, "output": "what the command printed"}  (ok = a task was changed)
+### or, for the GUI: {"call": "set_status", "params": [3, "done"]} -> {"ok": true, "result": {the task}}
+
+FLUSH_WHEN_IDLE = 0.05  # Sync held back writes after this many quiet seconds...
+FLUSH_AT_LEAST_EVERY = 0.5  # ...and never let them wait longer than this while busy.
+START_TIMEOUT = 2.0  # How long a client waits for a daemon it started.
+
+
+# Creating a [helper] path function
+def socket_path(task_file):
+    """Returns the socket file that belongs to todolist.json."""
+    root, _ = os.path.splitext(os.path.abspath(task_file))
+    return root + ".sock"
+
+
+def daemon_supported():
+    """Unix sockets don't exist everywhere (e.g. older Windows Pythons)."""
+    return hasattr(socket, "AF_UNIX")
+
+
+# Client side
+def send_request(task_file, request, timeout=30.0):
+    """Sends one request to the daemon and returns its answer. Raises OSError if it can't be reached."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.settimeout(timeout)
+        client.connect(socket_path(task_file))
+        client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with client.makefile("rb") as reply:
+            line = reply.readline()
+    if not line:
+        raise ConnectionError("The daemon closed the connection without answering.")
+    return json.loads(line)
+
+
+def start_daemon(task_file):
+    """Starts the daemon in the background and waits until it answers. Returns True if it did."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "task_daemon.py")
+    subprocess.Popen([sys.executable, script, os.path.abspath(task_file)],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)  # keep running after this command finishes
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            send_request(task_file, {"args": ["ping"]}, timeout=0.5)
+            return True
+        except OSError:
+            time.sleep(0.02)
+    return False
+
+
+def request_with_autostart(task_file, request):
+    """Sends a request, starting the daemon first if it isn't running. Returns None if that fails."""
+    if not daemon_supported():
+        return None
+    try:
+        return send_request(task_file, request)
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass  # Nobody is listening - start a daemon below.
+    except OSError:
+        return None
+    if not start_daemon(task_file):
+        return None
+    try:
+        return send_request(task_file, request)
+    except OSError:
+        return None
+
+
+def run_through_daemon(task_file, args, show_list=True, batch_lines=None):
+    """Runs a command line in the daemon and prints its output. Returns False if the daemon can't be used."""
+    response = request_with_autostart(task_file, {"args": args, "display": show_list, "lines": batch_lines})
+    if response is None:
+        return False
+    print(response["output"], end="")
+    return True
+
+
+class DaemonRepository:
+    """ Talks to the daemon with the same methods as TaskRepository, so the GUI can use either one. """
+
+    def __init__(self, task_file):
+        self.task_file = task_file
+
+    def available(self):
+        """ True if a daemon answers (one is started if needed). """
+        return request_with_autostart(self.task_file, {"args": ["ping"]}) is not None
+
+    def _call(self, method, *params):
+        response = request_with_autostart(self.task_file, {"call": method, "params": list(params)})
+        if response is None:
+            raise ConnectionError("The task daemon can't be reached.")
+        return response["result"]
+
+    def get(self, task_id):
+        return self._call("get", task_id)
+
+    def all(self):
+        return self._call("all")
+
+    def add(self, description):
+        return self._call("add", description)
+
+    def set_description(self, task_id, description):
+        return self._call("set_description", task_id, description)
+
+    def set_status(self, task_id, status):
+        return self._call("set_status", task_id, status)
+
+    def delete(self, task_id):
+        return self._call("delete", task_id)
+
+    def flush(self):
+        pass  # The daemon does its own syncing.
+
+    def use_records(self):
+        pass  # The tasks live in the daemon, which keeps them as records already.
+
+
+def stop_daemon(task_file):
+    """Asks a running daemon to save everything and exit."""
+    try:
+        send_request(task_file, {"args": ["stop"]})
+        print("✅ Daemon stopped.")
+    except OSError:
+        print("❌: No daemon is running.")
+
+
+# Server side
+REMOTE_METHODS = ("get", "all", "add", "set_description", "set_status", "delete")
+
+
+def handle_request(tracker, request):
+    """Runs one request against the warm tasks and returns the answer."""
+    ## {"call": ...} requests run one repository method and send back its result (used by DaemonRepository).
+    if "call" in request:
+        if request["call"] not in REMOTE_METHODS:
+            return {"ok": False, "result": None}
+        try:
+            result = getattr(tracker.get_repository(), request["call"])(*request.get("params", []))
+        except Exception as error:  # One bad request must not take the daemon down.
+            return {"ok": False, "result": None, "error": str(error)}
+        return {"ok": result is not None, "result": result}
+
+    args = request.get("args") or []
+    command = args[0].lower() if args else ""
+    if command == "ping":
+        return {"ok": True, "output": ""}
+
+    output = io.StringIO()
+    action_successful = False
+    with redirect_stdout(output):  # Everything the command prints goes back to the client.
+        try:
+            action_successful = tracker.run_cli(args, request.get("display", True), request.get("lines"))
+        except Exception as error:  # One bad request must not take the daemon down.
+            print(f"❌: The daemon couldn't run this command: {error}")
+    return {"ok": bool(action_successful), "output": output.getvalue()}
+
+
+def serve(task_file):
+    """Loads the tasks once, then answers requests until it's stopped."""
+    import task_tracker as tracker  # imported here, because task_tracker imports this module too
+
+    if not daemon_supported():
+        print("❌: Daemon mode needs Unix domain sockets, which this system doesn't have.")
+        return
+
+    path = socket_path(task_file)
+    if os.path.exists(path):
+        try:
+            send_request(task_file, {"args": ["ping"]}, timeout=0.5)
+            print("❌: A daemon is already running for these tasks.")
+            return
+        except OSError:
+            os.remove(path)  # Left behind by a daemon that crashed.
+
+    ## Load the tasks once and make every task_tracker function use this copy.
+    os.chdir(os.path.dirname(os.path.abspath(task_file)))
+    tracker.task_file = os.path.basename(task_file)
+    repository = tracker.get_repository()
+    repository.sync_writes = False  # write-behind: flush() syncs many changes at once
+    repository.use_records()  # Held for as long as the daemon runs, so about half the memory per task.
+    tracker.resident_repository = repository
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen()
+    server.settimeout(FLUSH_WHEN_IDLE)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))  # still runs the 'finally' below
+    print(f"✅ Task daemon listening on '{path}'.")
+
+    last_flush = time.monotonic()
+    try:
+        while True:
+            try:
+                connection, _ = server.accept()
+            except socket.timeout:  # Quiet moment - sync whatever is waiting.
+                repository.flush()
+                last_flush = time.monotonic()
+                continue
+
+            with connection:
+                connection.settimeout(5.0)
+                try:
+                    with connection.makefile("rb") as incoming:
+                        request = json.loads(incoming.readline() or b"{}")
+                    if request.get("args") == ["stop"]:
+                        connection.sendall(b'{"ok": true, "output": ""}\n')
+                        break
+                    repository.refresh()  # Changes other processes saved meanwhile (e.g. a CLI without the daemon).
+                    response = handle_request(tracker, request)
+                    connection.sendall((json.dumps(response, default=dict) + "\n").encode("utf-8"))  # Tasks go out as dicts.
+                except (OSError, ValueError):
+                    pass  # The client went away or sent garbage - just drop it.
+
+            if time.monotonic() - last_flush >= FLUSH_AT_LEAST_EVERY:
+                repository.flush()
+                last_flush = time.monotonic()
+    finally:
+        repository.flush()
+        server.close()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# The background process started by start_daemon() runs this file directly.
+if __name__ == "__main__":
+    serve(sys.argv[1] if len(sys.argv) > 1 else "todolist.json")
@@ -1,48 +1,173 @@
+import bisect  # keeps the row order sorted without re-sorting
+import queue
 import tkinter as tk
 from tkinter import messagebox
-from task_tracker import get_tasks, add_task, delete_task, update_status
+from task_tracker import get_repository, use_daemon, task_file
+from pbl_common.write_behind import WriteBehind
+import task_daemon
+
+# How the GUI stays fast with lots of tasks:
+## - tasks_by_id and row_ids (sorted ids) are the GUI's own copy, so a click never re-reads the file.
+## - Each action applies only the change it made (one task added, updated or removed).
+## - The listbox only ever holds the VISIBLE_ROWS rows on screen; scrolling swaps them.
+## - Loading and changes run on a worker thread; results come back to Tk with after().
+## - Changes are saved write-behind: the worker saves once a burst of clicks is over, not once per click
+##   (see pbl_common/write_behind.py). Closing the window saves the rest.
+
+VISIBLE_ROWS = 15
+POLL_MS = 30  # How often the Tk loop checks for finished background jobs.
+
+tasks_by_id = {}
+row_ids = []  # Task ids in display order (sorted by id).
+first_row = 0  # Index in row_ids of the top row on screen.
+
+
+# Background worker
+## Only the worker thread touches the repository (SQLite connections can't be shared between threads),
+## so it's opened by the first job and saved by the same thread.
+repository = None
+
+def open_repository():
+    """ The daemon's tasks when daemon mode is on (and it answers), otherwise the local files. """
+    if use_daemon:
+        daemon = task_daemon.DaemonRepository(task_file)
+        if daemon.available():
+            return daemon
+    return get_repository()
+
+def load_tasks():
+    global repository
+    repository = open_repository()
+    repository.sync_writes = False  # write-behind: save_changes() writes a burst of changes at once
+    repository.use_records()  # Held for as long as the window is open.
+    return repository.all()
+
+def call_repository(method, *args):
+    return getattr(repository, method)(*args)
+
+def save_changes():
+    if repository is not None:
+        repository.flush()
+
+writer = WriteBehind(save_changes)
+
+def run_in_background(method, *args, on_done):
+    """ Queues a repository change; on_done(result) runs later on the Tk thread. """
+    writer.submit(call_repository, method, *args, on_done=on_done)
+
+def poll_results():
+    while True:
+        try:
+            on_done, result, error = writer.finished.get_nowait()
+        except queue.Empty:
+            break
+        if error is not None:
+            messagebox.showerror("❌ Error", f"Something went wrong: {error}")
+        elif on_done is not None:
+            on_done(result)
+    root_window.after(POLL_MS, poll_results)
 
 
 # Functions
 ## Helper function
 def get_selected_task_id():
     try:
-        selected_item = task_listbox.get(task_listbox.curselection()) # Gets the selected item
-        task_id = int(selected_item.split(" | ")[0].replace("ID ", ""))
-        return task_id
-    except:
+        selected_row = task_listbox.curselection()[0] # Row on screen...
+        return row_ids[first_row + selected_row] # ...plus the scroll position gives the task's id.
+    except IndexError:
         messagebox.showwarning("⚠️ Selection error!⚠️","Please select a task from the list.")
         return None
 
-
-## Callback Function
-def refresh_task_list():
-    task_listbox.delete(0,tk.END) # Clear the listbox
-    tasks = get_tasks() #Get the tasks
-    for task in tasks: #for loop
-        display_text = f"ID {task['id']} | {task['status']} | {task['description']}"
-        task_listbox.insert(tk.END, display_text)
+def row_text(task):
+    return f"ID {task['id']} | {task['status']} | {task['description']}"
+
+
+## Virtual scrolling
+def render_window():
+    """ Fills the listbox with the rows that are on screen - never more than VISIBLE_ROWS. """
+    task_listbox.delete(0, tk.END)
+    visible_ids = row_ids[first_row:first_row + VISIBLE_ROWS]
+    task_listbox.insert(tk.END, *(row_text(tasks_by_id[task_id]) for task_id in visible_ids))
+    total = len(row_ids)
+    if total <= VISIBLE_ROWS:
+        scrollbar.set(0, 1)
+    else:
+        scrollbar.set(first_row / total, (first_row + VISIBLE_ROWS) / total)
+
+def scroll_to(row):
+    global first_row
+    first_row = max(0, min(row, len(row_ids) - VISIBLE_ROWS))
+    render_window()
+
+def on_scrollbar(action, amount, unit=None):
+    if action == "moveto":
+        scroll_to(int(float(amount) * len(row_ids)))
+    elif action == "scroll":
+        step = VISIBLE_ROWS if unit == "pages" else 1
+        scroll_to(first_row + int(amount) * step)
+
+def on_mouse_wheel(event):
+    if event.num == 4 or event.delta > 0:  # Button-4 is "wheel up" on Linux.
+        scroll_to(first_row - 3)
+    else:
+        scroll_to(first_row + 3)
+    return "break"  # Stop the listbox scrolling its own (tiny) contents.
+
+
+## Applying changes - each one touches only the task that changed.
+def show_all_tasks(tasks):
+    """ First load: build the GUI's copy of the tasks. """
+    tasks_by_id.clear()
+    tasks_by_id.update((task["id"], task) for task in tasks)
+    row_ids[:] = sorted(tasks_by_id)
+    scroll_to(0)
+
+def apply_added(task):
+    tasks_by_id[task["id"]] = task
+    bisect.insort(row_ids, task["id"])
+    scroll_to(bisect.bisect_left(row_ids, task["id"]))  # Show the new task.
+
+def apply_updated(task):
+    if task is None:
+        messagebox.showwarning("⚠️ Not found ⚠️", "That task doesn't exist anymore.")
+        return
+    tasks_by_id[task["id"]] = task
+    screen_row = bisect.bisect_left(row_ids, task["id"]) - first_row
+    if 0 <= screen_row < VISIBLE_ROWS:  # Only redraw the row if it's on screen.
+        task_listbox.delete(screen_row)
+        task_listbox.insert(screen_row, row_text(task))
+
+def apply_deleted(task):
+    if task is None:
+        messagebox.showwarning("⚠️ Not found ⚠️", "That task doesn't exist anymore.")
+        return
+    tasks_by_id.pop(task["id"], None)
+    position = bisect.bisect_left(row_ids, task["id"])
+    if position < len(row_ids) and row_ids[position] == task["id"]:
+        row_ids.pop(position)
+    scroll_to(first_row)
 
 
 ## Button logic
 def add_task_gui():
     description = task_entry.get() #entry widget adds description
     if description:
-        add_task(description)
+        run_in_background("add", description, on_done=apply_added)
         task_entry.delete(0, tk.END)
-        refresh_task_list()
 
 def delete_task_gui():
     task_id = get_selected_task_id()
     if task_id is not None:
-        if delete_task(task_id):
-            refresh_task_list()
+        run_in_background("delete", task_id, on_done=apply_deleted)
 
 def mark_done_gui():
     task_id = get_selected_task_id()
     if task_id is not None:
-        update_status(task_id, "done")
-        refresh_task_list()
+        run_in_background("set_status", task_id, "done", on_done=apply_updated)
+
+def close_window():
+    writer.close()  # Save anything pending and wait for it before closing.
+    root_window.destroy()
 
 
 # GUI Setup
@@ -61,8 +186,15 @@ entry_frame = tk.Frame(root_window)
 
 
 ## Widgets
-task_listbox = tk.Listbox(root_window, height=15)
-task_listbox.pack(pady=10, padx=10, fill="x")
+list_frame = tk.Frame(root_window)
+list_frame.pack(pady=10, padx=10, fill="x")
+task_listbox = tk.Listbox(list_frame, height=VISIBLE_ROWS)
+scrollbar = tk.Scrollbar(list_frame, orient=tk.VERTICAL, command=on_scrollbar)
+scrollbar.pack(side="right", fill="y")
+task_listbox.pack(side="left", fill="x", expand=True)
+task_listbox.bind("<MouseWheel>", on_mouse_wheel)
+task_listbox.bind("<Button-4>", on_mouse_wheel)
+task_listbox.bind("<Button-5>", on_mouse_wheel)
 action_frame = tk.Frame(root_window)
 action_frame.pack(pady = 10)
 
@@ -86,5 +218,7 @@ delete_button.pack(side="left")
 
 
 # Run application
-refresh_task_list() # retrieve initial load
+writer.submit(load_tasks, on_done=show_all_tasks, change=False) # retrieve initial load (in the background)
+root_window.protocol("WM_DELETE_WINDOW", close_window)
+root_window.after(POLL_MS, poll_results)
 root_window.mainloop() # start the main event loop
\ No newline at end of file
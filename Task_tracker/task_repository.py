@@ -0,0 +1,406 @@
+import os
+from datetime import datetime
+from task_storage import (read_meta, read_snapshot, read_journal, read_journal_from, flatten_records, renumber_record,
+                          apply_record, append_records, needs_compaction, compact, select_tasks, selection_test,
+                          journal_path, lock_path, Task)
+from task_search import SearchIndex, remove_index
+from pbl_common import file_lock, profiling
+
+STATUSES = ("todo", "in-progress", "done")
+
+
+class TaskRepository:
+    """ Keeps the tasks in memory with an index, so finding a task doesn't mean scanning the list.
+
+    - tasks: id -> task dictionary
+    - status_ids: status -> set of ids with that status
+    - next_id: the next id to hand out (stored, so deleted ids are never reused)
+    - version, journal_size: how far into the files this copy has read (to catch up with other processes)
+    """
+
+    def __init__(self, task_file):
+        self.task_file = task_file
+        self.tasks = {}
+        self.status_ids = {status: set() for status in STATUSES}
+        self.next_id = 1
+        self.journal_records = 0
+        self.version = 0  # Bumped by every compaction (stored in the meta file).
+        self.journal_size = 0  # Bytes of the journal already read or written by us.
+        self.pending = None  # List of held back records while a batch is open.
+        self.pending_changes = 0  # ...and how many changes they hold (a bulk record holds many).
+        self.sync_writes = True  # False = write-behind: records wait in self.unsynced until flush().
+        self.unsynced = []
+        self._search_index = None  # Loaded the first time someone searches.
+        self.changed_ids = set()  # Ids changed since the saved search index was written.
+        self.records = False  # True = the tasks are kept as compact Task records (see use_records).
+
+    @classmethod
+    def load(cls, task_file):
+        """ Loads the snapshot + journal and builds the index once. """
+        repository = cls(task_file)
+        with file_lock.locked(lock_path(task_file), shared=True):  # Never half way through someone's compaction.
+            repository._read_files()
+        return repository
+
+    def _read_files(self):
+        """ Reads the snapshot + journal into this copy, from scratch. The caller holds the lock. """
+        tasks = {task["id"]: task for task in read_snapshot(self.task_file)}
+        records = list(flatten_records(read_journal(self.task_file)))
+        meta = read_meta(self.task_file)
+        with profiling.phase("scan"):  # Replaying the journal and building the status index.
+            highest_id = max(tasks, default=0)
+            for record in records:
+                apply_record(tasks, record)
+                if record["op"] == "add":
+                    highest_id = max(highest_id, record["task"]["id"])
+
+            self.tasks = tasks
+            self.status_ids = {status: set() for status in STATUSES}
+            for task_id, task in tasks.items():
+                self.status_ids.setdefault(task["status"], set()).add(task_id)
+            if self.records:
+                self._use_records()
+        self.next_id = max(self.next_id, meta.get("next_id", 1), highest_id + 1)
+        self.journal_records = len(records)
+        self.version = meta.get("version", 0)
+        self.journal_size = _file_size(journal_path(self.task_file))
+        self._search_index = None
+        self.changed_ids = {record["task"]["id"] if record["op"] == "add" else record["id"]
+                            for record in records}
+
+    def use_records(self):
+        """ Keeps the tasks as compact Task records from now on - for processes that hold the tasks for a long
+        time (the daemon, the GUI). About half the memory per task, paid for with a slower load, so the CLI doesn't. """
+        self.records = True
+        with profiling.phase("scan"):
+            self._use_records()
+
+    def _use_records(self):
+        tasks = self.tasks
+        for task_id, task in tasks.items():
+            tasks[task_id] = Task.from_dict(task)  # Same keys, so the dict isn't resized.
+
+    # Queries
+    def get(self, task_id):
+        """ Returns the task with this id, or None. """
+        return self.tasks.get(task_id)
+
+    def all(self):
+        """ Returns every task in file order. """
+        return list(self.tasks.values())
+
+    def with_status(self, status):
+        """ Returns the tasks with a status, sorted by id. Costs the number of matches, not the number of tasks. """
+        with profiling.phase("sort"):
+            return [self.tasks[task_id] for task_id in sorted(self.status_ids.get(status, ()))]
+
+    def list_tasks(self, status=None, sort=None, offset=0, limit=None):
+        """ Filtered, sorted and paged tasks (see task_storage.select_tasks). """
+        tasks = self.with_status(status) if status is not None else self.tasks.values()
+        return select_tasks(tasks, None, sort, offset, limit)
+
+    def search(self, terms, status=None):
+        """ Tasks whose description has every term (whole words or word starts), sorted by id. """
+        index = self.search_index
+        with profiling.phase("scan"):
+            ids = index.search(terms)
+            if status is not None:
+                ids &= self.status_ids.get(status, set())
+        with profiling.phase("sort"):
+            return [self.tasks[task_id] for task_id in sorted(ids)]
+
+    def select_ids(self, selection):
+        """ The ids of the tasks a selection matches, sorted - one pass over the fewest candidates.
+
+        A status narrows the search to that status's ids, and small id ranges are looked up instead of scanned.
+        """
+        with profiling.phase("scan"):
+            ranges = selection.get("ranges")
+            if selection.get("status") is not None:
+                candidates = self.status_ids.get(selection["status"], set())
+            elif ranges is not None and sum(last - first + 1 for first, last in ranges) < len(self.tasks):
+                candidates = {task_id for first, last in ranges for task_id in range(first, last + 1)}
+            else:
+                candidates = self.tasks.keys()
+            matches = selection_test(selection)
+            ids = [task_id for task_id in candidates if task_id in self.tasks and matches(self.tasks[task_id])]
+        with profiling.phase("sort"):
+            ids.sort()
+        return ids
+
+    def __len__(self):
+        return len(self.tasks)
+
+    # Changes - each one updates the index and appends one journal record.
+    def add(self, description):
+        """ Creates a new 'todo' task and returns it. """
+        now = datetime.now().isoformat()
+        task = {
+            "id": self.next_id,
+            "description": description,
+            "status": "todo",
+            "createdAt": now,
+            "updatedAt": now
+        }
+        self.tasks[task["id"]] = task
+        self.status_ids.setdefault("todo", set()).add(task["id"])
+        self.next_id += 1
+        self._reindex(task["id"])
+        self._save({"op": "add", "task": task})
+        return task
+
+    def set_description(self, task_id, description):
+        """ Changes a task's description. Returns the task, or None if it doesn't exist. """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        task["description"] = description
+        task["updatedAt"] = datetime.now().isoformat()
+        self._reindex(task_id)
+        self._save({"op": "edit", "id": task_id, "description": description, "updatedAt": task["updatedAt"]})
+        return task
+
+    def set_status(self, task_id, status):
+        """ Changes a task's status. Returns the task, or None if it doesn't exist. """
+        task = self.tasks.get(task_id)
+        if task is None:
+            return None
+        self.status_ids[task["status"]].discard(task_id)
+        self.status_ids.setdefault(status, set()).add(task_id)
+        task["status"] = status
+        task["updatedAt"] = datetime.now().isoformat()
+        self._save({"op": "status", "id": task_id, "status": status, "updatedAt": task["updatedAt"]})
+        return task
+
+    def delete(self, task_id):
+        """ Removes a task. Returns the removed task, or None if it doesn't exist. """
+        task = self.tasks.pop(task_id, None)
+        if task is None:
+            return None
+        self.status_ids[task["status"]].discard(task_id)
+        self._reindex(task_id)
+        self._save({"op": "delete", "id": task_id})
+        return task
+
+    # Bulk changes - one timestamp and one journal record for any number of tasks.
+    def set_status_where(self, selection, status):
+        """ Changes the status of every matching task (those that have it already are left alone).
+
+        Returns the ids that changed.
+        """
+        ids = [task_id for task_id in self.select_ids(selection) if self.tasks[task_id]["status"] != status]
+        if not ids:
+            return ids
+        now = datetime.now().isoformat()
+        target = self.status_ids.setdefault(status, set())
+        with profiling.phase("scan"):
+            for task_id in ids:
+                task = self.tasks[task_id]
+                self.status_ids[task["status"]].discard(task_id)
+                target.add(task_id)
+                task["status"] = status
+                task["updatedAt"] = now
+        self._save({"op": "status", "ids": ids, "status": status, "updatedAt": now}, len(ids))
+        return ids
+
+    def delete_where(self, selection):
+        """ Removes every matching task. Returns the ids that were removed. """
+        ids = self.select_ids(selection)
+        if not ids:
+            return ids
+        with profiling.phase("scan"):
+            for task_id in ids:
+                task = self.tasks.pop(task_id)
+                self.status_ids[task["status"]].discard(task_id)
+                self._reindex(task_id)
+        self._save({"op": "delete", "ids": ids}, len(ids))
+        return ids
+
+    # Search index
+    @property
+    def search_index(self):
+        """ The search index - loaded from todolist.index.json (or built) the first time it's needed. """
+        if self._search_index is None:
+            index = SearchIndex.load(self.task_file)
+            if index is None:  # Missing, or saved for another snapshot.
+                with profiling.phase("scan"):
+                    index = SearchIndex.build(self.tasks.values())
+                index.save(self.task_file)
+            self._search_index = index
+            ## Catch up with the changes made since the index was saved.
+            for task_id in self.changed_ids:
+                self._reindex(task_id)
+        return self._search_index
+
+    def _reindex(self, task_id):
+        """ Keeps the search index in step with one changed task. """
+        if self._search_index is None:
+            self.changed_ids.add(task_id)  # Caught up when the index is loaded.
+            return
+        task = self.tasks.get(task_id)
+        if task is None:
+            self._search_index.remove(task_id)
+        else:
+            self._search_index.update(task_id, task["description"])
+
+    # Storage
+    def _save(self, record, changes=1):
+        """ Appends one record to the journal (or holds it back during a batch). """
+        if self.pending is not None:
+            self.pending.append(record)
+            self.pending_changes += changes
+            return
+        self._write(record, changes)
+
+    def _write(self, record, changes):
+        """ Appends a record to the journal (or holds it back for flush() with write-behind). """
+        self.journal_records += changes
+        if not self.sync_writes:
+            self.unsynced.append(record)
+            return
+        self._append([record])
+
+    def flush(self):
+        """ Writes the records held back by write-behind, all in one append (and one fsync). """
+        if not self.unsynced:
+            return
+        records, self.unsynced = self.unsynced, []
+        self._append(records)
+
+    def _append(self, records):
+        """ Catches up with other processes, then appends our records - the only time the lock is held.
+
+        Compacts instead when the journal has got too long (the new snapshot holds these records too,
+        so a big bulk change is written once, not twice).
+        """
+        with file_lock.locked(lock_path(self.task_file)):
+            records = self._catch_up(records)
+            if needs_compaction(len(self.tasks), self.journal_records):
+                self._compact()
+                return
+            self.journal_size = append_records(self.task_file, records, sync=False)
+        file_lock.sync(journal_path(self.task_file))  # The fsync doesn't need the lock.
+
+    def refresh(self):
+        """ Picks up the changes other processes have saved. Our own unsaved changes stay on top. """
+        if self.pending is not None:
+            return
+        with file_lock.locked(lock_path(self.task_file), shared=True):
+            self.unsynced = self._catch_up(self.unsynced)
+
+    # Several processes - the CLI, the GUI and the daemon can all change the same tasks.
+    def _catch_up(self, ours):
+        """ Applies what other processes wrote since we last looked, then our own records (ours) on top.
+
+        ours are changes already made to this copy but not saved yet. The result is the same as
+        replaying the journal with ours appended at the end, so nobody's change is lost:
+          - someone appended: their records are read from where we stopped and applied;
+          - someone compacted (the version changed): their snapshot is read from scratch.
+        A task we added whose id someone else handed out first gets the next free id.
+        Returns ours, renumbered where needed. The caller holds the lock.
+        """
+        version = read_meta(self.task_file).get("version", 0)
+        size = _file_size(journal_path(self.task_file))
+        if version == self.version and size == self.journal_size:  # Nobody else wrote - the usual case.
+            return ours
+
+        our_records = list(flatten_records(ours))
+        our_tasks = {record["task"]["id"]: self.tasks.get(record["task"]["id"])  # None: we deleted it again.
+                     for record in our_records if record["op"] == "add"}
+        with profiling.phase("scan"):
+            if version == self.version and size > self.journal_size:
+                theirs, self.journal_size = read_journal_from(self.task_file, self.journal_size)
+                theirs = list(flatten_records(theirs))
+                for record in theirs:
+                    self._apply(record)
+                self.journal_records += len(theirs)
+            else:
+                self._read_files()
+                self.journal_records += len(our_records)  # Ours still have to be written.
+
+            renumbered = {}
+            for old_id in sorted(our_tasks):
+                if old_id in self.tasks and self.tasks[old_id] is not our_tasks[old_id]:
+                    renumbered[old_id] = self.next_id
+                    self.next_id += 1
+            if renumbered:
+                ours = [renumber_record(record, renumbered) for record in ours]
+                our_records = list(flatten_records(ours))
+                our_tasks = {renumbered.get(old_id, old_id): task for old_id, task in our_tasks.items()}
+
+            for record in our_records:
+                if record["op"] != "add":
+                    self._apply(record)
+                    continue
+                task_id, task = record["task"]["id"], our_tasks[record["task"]["id"]]
+                if task is None or self.tasks.get(task_id) is task:
+                    continue
+                task["id"] = task_id  # The caller's task object keeps its place, under its new id.
+                self.tasks[task_id] = task
+                self.status_ids.setdefault(task["status"], set()).add(task_id)
+                self._reindex(task_id)
+        return ours
+
+    def _apply(self, record):
+        """ Applies one journal record to this copy and keeps the status index and search index in step. """
+        task_id = record["task"]["id"] if record["op"] == "add" else record["id"]
+        before = self.tasks.get(task_id)
+        if before is not None:
+            self.status_ids[before["status"]].discard(task_id)
+        apply_record(self.tasks, record)
+        after = self.tasks.get(task_id)
+        if after is not None:
+            self.status_ids.setdefault(after["status"], set()).add(task_id)
+        if record["op"] != "status":
+            self._reindex(task_id)
+        if record["op"] == "add":
+            self.next_id = max(self.next_id, task_id + 1)
+    # Batches - many changes, one write.
+    def begin_batch(self):
+        """ Holds changes in memory until commit_batch() so they're saved together. """
+        self.pending = []
+        self.pending_changes = 0
+
+    def commit_batch(self):
+        """ Saves every held back change as one journal record. Returns the number of changes. """
+        records, self.pending = self.pending, None
+        if records:
+            self._write({"op": "batch", "records": records}, self.pending_changes)
+        return self.pending_changes
+
+    def rollback_batch(self):
+        """ Throws away the held back changes and reloads the tasks from disk. """
+        self.pending = None
+        self.flush()  # Earlier changes that are only in memory must reach the disk first.
+        sync_writes, records = self.sync_writes, self.records
+        self.__dict__.update(TaskRepository.load(self.task_file).__dict__)
+        self.sync_writes, self.records = sync_writes, records
+        if records:
+            self._use_records()
+
+    def compact(self):
+        """ Folds the journal back into the snapshot. Returns how many records were folded. """
+        with file_lock.locked(lock_path(self.task_file)):
+            self.unsynced = self._catch_up(self.unsynced)
+            return self._compact()
+
+    def _compact(self):
+        folded = self.journal_records
+        compact(self.task_file, self.tasks, {"next_id": self.next_id, "version": self.version + 1})
+        if self._search_index is not None:
+            self._search_index.save(self.task_file)  # In step with the tasks, so save it for the new snapshot.
+        else:
+            remove_index(self.task_file)  # Stale now. Nobody searched, so don't build it - the next search does.
+        self.version += 1
+        self.journal_size = 0
+        self.journal_records = 0
+        self.unsynced = []  # The new snapshot already holds these changes.
+        self.changed_ids = set()
+        return folded
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,133 @@
+import bisect  # finds every word with a given prefix in a sorted list
+import json
+import os
+import re
+from task_storage import write_json_atomic
+from pbl_common import profiling
+
+# Full-text search over task descriptions.
+## An inverted index: word -> set of task ids whose description contains it.
+## A sorted list of all the words makes prefix searches a bisect instead of a scan.
+## The index is saved next to todolist.json (todolist.index.json) when it's built, and again when the journal
+## is compacted if it was in use. A compaction without it deletes the file; the next search builds it again.
+
+WORD = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Splits text into lowercase words."""
+    return set(WORD.findall(text.lower()))
+
+
+# Creating a [helper] path function
+def index_path(task_file):
+    """Returns the search index file that belongs to todolist.json."""
+    root, _ = os.path.splitext(task_file)
+    return root + ".index.json"
+
+
+def remove_index(task_file):
+    """Deletes the saved index (if any) - for when it no longer matches the snapshot."""
+    try:
+        os.remove(index_path(task_file))
+    except FileNotFoundError:
+        pass
+
+
+def file_signature(path):
+    """Size and modification time - enough to notice that a snapshot was rewritten."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class SearchIndex:
+    """ word -> task ids, kept up to date one task at a time. """
+
+    def __init__(self):
+        self.postings = {}  # word -> set of ids
+        self.words_by_id = {}  # id -> set of words (so a task can be taken out again)
+        self.sorted_words = []
+
+    @classmethod
+    def build(cls, tasks):
+        """ Indexes every task from scratch. """
+        index = cls()
+        for task in tasks:
+            words = tokenize(task["description"])
+            index.words_by_id[task["id"]] = words
+            for word in words:
+                index.postings.setdefault(word, set()).add(task["id"])
+        index.sorted_words = sorted(index.postings)
+        return index
+
+    # Keeping it up to date
+    def add(self, task_id, description):
+        words = tokenize(description)
+        self.words_by_id[task_id] = words
+        for word in words:
+            ids = self.postings.get(word)
+            if ids is None:
+                self.postings[word] = ids = set()
+                bisect.insort(self.sorted_words, word)
+            ids.add(task_id)
+
+    def remove(self, task_id):
+        for word in self.words_by_id.pop(task_id, ()):
+            ids = self.postings[word]
+            ids.discard(task_id)
+            if not ids:  # Nobody uses this word anymore.
+                del self.postings[word]
+                self.sorted_words.pop(bisect.bisect_left(self.sorted_words, word))
+
+    def update(self, task_id, description):
+        self.remove(task_id)
+        self.add(task_id, description)
+
+    # Searching
+    def words_with_prefix(self, prefix):
+        start = bisect.bisect_left(self.sorted_words, prefix)
+        end = start
+        while end < len(self.sorted_words) and self.sorted_words[end].startswith(prefix):
+            end += 1
+        return self.sorted_words[start:end]
+
+    def search(self, terms):
+        """ Ids of tasks that have every term (as a word or the start of a word). """
+        matches = None
+        for term in sorted(tokenize(terms)):
+            ids = set()
+            for word in self.words_with_prefix(term):
+                ids |= self.postings[word]
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return set()
+        return matches or set()
+
+    # Saving and loading
+    def save(self, task_file):
+        """ Saves the index together with the signature of the snapshot it belongs to. """
+        write_json_atomic(index_path(task_file), {
+            "snapshot": file_signature(task_file),
+            "words": {word: sorted(ids) for word, ids in self.postings.items()}
+        }, indent=None)  # Machine-only file, so no pretty-printing.
+
+    @classmethod
+    def load(cls, task_file):
+        """ Loads the saved index, or returns None if it's missing or belongs to another snapshot. """
+        try:
+            with profiling.phase("parse"), open(index_path(task_file), "r") as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if saved.get("snapshot") != file_signature(task_file):
+            return None
+        index = cls()
+        for word, ids in saved["words"].items():
+            index.postings[word] = set(ids)
+            for task_id in ids:
+                index.words_by_id.setdefault(task_id, set()).add(word)
+        index.sorted_words = sorted(index.postings)
+        return index
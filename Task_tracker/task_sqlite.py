@@ -0,0 +1,291 @@
+import os
+import sqlite3  # database that ships with Python
+from datetime import datetime
+from task_repository import TaskRepository  # used to read the JSON files once, when migrating
+from task_storage import SORT_KEYS
+from task_search import tokenize
+
+# SQLite storage for the task tracker.
+## The tasks live in todolist.db next to todolist.json. Filtering and sorting happen inside
+## the database (with indexes), so Python only sees the rows it asked for.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,  -- AUTOINCREMENT never hands out a deleted id again
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    createdAt TEXT NOT NULL,
+    updatedAt TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (status, id);
+CREATE INDEX IF NOT EXISTS tasks_by_updated ON tasks (updatedAt);
+CREATE TABLE IF NOT EXISTS task_words (  -- search index: one row per word per task
+    word TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    PRIMARY KEY (word, task_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS task_words_by_task ON task_words (task_id);
+"""
+SCHEMA_VERSION = 1  # 1 = task_words is filled
+
+
+# Creating a [helper] path function
+def database_path(task_file):
+    """Returns the database file that belongs to todolist.json."""
+    root, _ = os.path.splitext(task_file)
+    return root + ".db"
+
+
+class SqliteTaskRepository:
+    """ Same methods as TaskRepository, but every query runs in SQLite. """
+
+    def __init__(self, task_file, connection):
+        self.task_file = task_file
+        self.connection = connection
+        self.in_batch = False
+        self.batch_changes = 0  # Tasks changed since begin_batch() (task_words rows don't count).
+        self.sync_writes = True  # False = write-behind: changes are committed by flush().
+        self.unsynced = False
+
+    @classmethod
+    def load(cls, task_file):
+        """ Opens (and if needed creates) the database. A new database is filled from todolist.json once. """
+        path = database_path(task_file)
+        is_new = not os.path.exists(path)
+        connection = sqlite3.connect(path)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")  # readers don't block the writer
+        connection.execute("PRAGMA synchronous=NORMAL")  # safe with WAL, and much faster than FULL
+        connection.executescript(SCHEMA)
+        repository = cls(task_file, connection)
+        if is_new:
+            repository.migrate_from_json()
+        if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            repository.rebuild_search_index()  # Databases made before search existed.
+        return repository
+
+    def rebuild_search_index(self):
+        """ Fills task_words from scratch. """
+        with self.connection:
+            self.connection.execute("DELETE FROM task_words")
+            for task_id, description in self.connection.execute("SELECT id, description FROM tasks").fetchall():
+                self._index_words(task_id, description)
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _index_words(self, task_id, description):
+        self.connection.executemany("INSERT OR IGNORE INTO task_words (word, task_id) VALUES (?, ?)",
+                                    ((word, task_id) for word in tokenize(description)))
+
+    def migrate_from_json(self):
+        """ One-shot import of todolist.json (and its journal) into the database. Returns the number of tasks. """
+        json_repository = TaskRepository.load(self.task_file)
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO tasks (id, description, status, createdAt, updatedAt) VALUES (?, ?, ?, ?, ?)",
+                ((task["id"], task["description"], task["status"], task["createdAt"], task["updatedAt"])
+                 for task in json_repository.all()))
+            ## Carry the id counter over, so ids deleted before the migration stay unused.
+            self.connection.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+            self.connection.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('tasks', ?)",
+                                    (json_repository.next_id - 1,))
+        if len(json_repository):
+            print(f"✅ Migrated {len(json_repository)} task(s) from '{self.task_file}' to '{database_path(self.task_file)}'.")
+        return len(json_repository)
+
+    # Queries
+    def get(self, task_id):
+        """ Returns the task with this id, or None. """
+        row = self.connection.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return dict(row) if row else None
+
+    def all(self):
+        """ Returns every task, sorted by id. """
+        return [dict(row) for row in self.connection.execute("SELECT * FROM tasks ORDER BY id")]
+
+    def with_status(self, status):
+        """ Returns the tasks with a status, sorted by id (read straight from the status index). """
+        return [dict(row) for row in
+                self.connection.execute("SELECT * FROM tasks WHERE status = ? ORDER BY id", (status,))]
+
+    def list_tasks(self, status=None, sort=None, offset=0, limit=None):
+        """ Filtered, sorted and paged tasks. WHERE, ORDER BY and LIMIT all run in the database. """
+        key_name = (sort or "id").lstrip("-")
+        if key_name not in SORT_KEYS:  # Column names can't be query parameters, so only allow known ones.
+            raise ValueError(f"Can't sort by '{key_name}'.")
+        direction = "DESC" if sort and sort.startswith("-") else "ASC"
+        query = "SELECT * FROM tasks"
+        parameters = []
+        if status is not None:
+            query += " WHERE status = ?"
+            parameters.append(status)
+        query += f" ORDER BY {key_name} {direction}, id LIMIT ? OFFSET ?"
+        parameters += [-1 if limit is None else limit, offset]
+        return (dict(row) for row in self.connection.execute(query, parameters))
+
+    def search(self, terms, status=None):
+        """ Tasks whose description has every term (whole words or word starts), sorted by id. """
+        matches = None
+        for term in sorted(tokenize(terms)):
+            ## A prefix is a range in the sorted (word, task_id) primary key.
+            ids = {row[0] for row in self.connection.execute(
+                "SELECT task_id FROM task_words WHERE word >= ? AND word < ?", (term, term + "\U0010ffff"))}
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        if not matches:
+            return []
+        tasks = [self.get(task_id) for task_id in sorted(matches)]
+        return [task for task in tasks if status is None or task["status"] == status]
+
+    def select_ids(self, selection):
+        """ The ids of the tasks a selection matches, sorted. """
+        condition, parameters = self._selection_sql(selection)
+        return [row[0] for row in self.connection.execute(
+            f"SELECT id FROM tasks WHERE {condition} ORDER BY id", parameters)]
+
+    def _selection_sql(self, selection):
+        """ A selection (see task_tracker.parse_selection) as a WHERE condition and its parameters. """
+        conditions, parameters = [], []
+        if selection.get("ranges") is not None:
+            conditions.append("(" + " OR ".join("id BETWEEN ? AND ?" for _ in selection["ranges"]) + ")")
+            parameters += [bound for task_range in selection["ranges"] for bound in task_range]
+        if selection.get("status") is not None:
+            conditions.append("status = ?")
+            parameters.append(selection["status"])
+        if selection.get("updated_before") is not None:
+            conditions.append("updatedAt < ?")
+            parameters.append(selection["updated_before"])
+        for name, value in (selection.get("where") or {}).items():
+            if name not in SORT_KEYS:  # Column names can't be query parameters, so only allow known ones.
+                raise ValueError(f"Unknown field '{name}'.")
+            conditions.append(f"CAST({name} AS TEXT) = ?")
+            parameters.append(value)
+        return " AND ".join(conditions) or "1", parameters
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def __bool__(self):
+        return self.connection.execute("SELECT 1 FROM tasks LIMIT 1").fetchone() is not None
+
+    # Changes
+    def add(self, description):
+        """ Creates a new 'todo' task and returns it. """
+        now = datetime.now().isoformat()
+        cursor = self.connection.execute(
+            "INSERT INTO tasks (description, status, createdAt, updatedAt) VALUES (?, 'todo', ?, ?)",
+            (description, now, now))
+        self._index_words(cursor.lastrowid, description)
+        self._save()
+        return {"id": cursor.lastrowid, "description": description, "status": "todo",
+                "createdAt": now, "updatedAt": now}
+
+    def set_description(self, task_id, description):
+        """ Changes a task's description. Returns the task, or None if it doesn't exist. """
+        if not self._update(task_id, "description", description):
+            return None
+        self.connection.execute("DELETE FROM task_words WHERE task_id = ?", (task_id,))
+        self._index_words(task_id, description)
+        self._save()
+        return self.get(task_id)
+
+    def set_status(self, task_id, status):
+        """ Changes a task's status. Returns the task, or None if it doesn't exist. """
+        if not self._update(task_id, "status", status):
+            return None
+        self._save()
+        return self.get(task_id)
+
+    def _update(self, task_id, column, value):
+        """ Sets one column (and updatedAt). Returns False if there's no such task. """
+        now = datetime.now().isoformat()
+        cursor = self.connection.execute(f"UPDATE tasks SET {column} = ?, updatedAt = ? WHERE id = ?",
+                                         (value, now, task_id))
+        return cursor.rowcount > 0
+
+    def delete(self, task_id):
+        """ Removes a task. Returns the removed task, or None if it doesn't exist. """
+        task = self.get(task_id)
+        if task is None:
+            return None
+        self.connection.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        self.connection.execute("DELETE FROM task_words WHERE task_id = ?", (task_id,))
+        self._save()
+        return task
+
+    # Bulk changes - one UPDATE / DELETE statement, one timestamp, one commit.
+    def set_status_where(self, selection, status):
+        """ Changes the status of every matching task (those that have it already are left alone).
+
+        Returns the ids that changed.
+        """
+        condition, parameters = self._selection_sql(selection)
+        condition = f"({condition}) AND status != ?"
+        parameters.append(status)
+        ids = [row[0] for row in self.connection.execute(f"SELECT id FROM tasks WHERE {condition} ORDER BY id",
+                                                         parameters)]
+        if ids:
+            self.connection.execute(f"UPDATE tasks SET status = ?, updatedAt = ? WHERE {condition}",
+                                    [status, datetime.now().isoformat()] + parameters)
+            self._save(len(ids))
+        return ids
+
+    def delete_where(self, selection):
+        """ Removes every matching task. Returns the ids that were removed. """
+        condition, parameters = self._selection_sql(selection)
+        ids = [row[0] for row in self.connection.execute(f"SELECT id FROM tasks WHERE {condition} ORDER BY id",
+                                                         parameters)]
+        if ids:
+            self.connection.execute(f"DELETE FROM task_words WHERE task_id IN (SELECT id FROM tasks WHERE {condition})",
+                                    parameters)
+            self.connection.execute(f"DELETE FROM tasks WHERE {condition}", parameters)
+            self._save(len(ids))
+        return ids
+
+    # Storage
+    def _save(self, changes=1):
+        """ Commits the change, unless a batch is open or writes are held back. """
+        if self.in_batch:
+            self.batch_changes += changes
+            return
+        if self.sync_writes:
+            self.connection.commit()
+        else:
+            self.unsynced = True
+
+    def refresh(self):
+        """ Nothing to catch up with: every query reads the database, which SQLite locks for us. """
+
+    def use_records(self):
+        """ Nothing to do: the tasks stay in the database, not in memory. """
+
+    def flush(self):
+        """ Commits the changes held back by write-behind in one transaction. """
+        if self.unsynced:
+            self.connection.commit()
+            self.unsynced = False
+
+    def begin_batch(self):
+        """ Keeps changes in one transaction until commit_batch(). """
+        self.flush()  # A rollback must not take earlier held back changes with it.
+        self.in_batch = True
+        self.batch_changes = 0
+
+    def commit_batch(self):
+        """ Commits the batch transaction. Returns the number of changed tasks. """
+        self.in_batch = False
+        self._save()
+        return self.batch_changes
+
+    def rollback_batch(self):
+        """ Throws the batch transaction away. """
+        self.in_batch = False
+        self.connection.rollback()
+        self.unsynced = False
+
+    def compact(self):
+        """ Folds the WAL file back into the database and reclaims free space. """
+        self.flush()
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.connection.execute("VACUUM")
+        return 0
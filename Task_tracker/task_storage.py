@@ -0,0 +1,287 @@
+import heapq  # top-k selection without sorting everything
+import itertools
+import json  # read and write JSON - database
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The repository folder, for pbl_common.
+from pbl_common.serializers import JsonSerializer, write_text_atomic
+from pbl_common import file_lock, journal, profiling
+from pbl_common.records import Record, plain
+
+# How the storage works:
+## The snapshot (todolist.json) keeps the same JSON array format as always.
+## Every change is appended as one line to a journal file next to it, so a change
+## costs one small write instead of rewriting every task.
+## Loading = read the snapshot + replay the journal on top of it.
+## Compaction folds the journal back into the snapshot and empties the journal.
+## Several processes can share the files (CLI, GUI, daemon): writers lock todolist.lock, catch up with
+## what the others appended since they last looked, then append (see TaskRepository._write).
+## Every compaction bumps the "version" in todolist.meta.json, so a process knows when its view is stale.
+
+JOURNAL_SUFFIX = ".journal"
+META_SUFFIX = ".meta.json"  # Small file with the id counter and version, written on compaction.
+LOCK_SUFFIX = ".lock"
+MIN_COMPACT_RECORDS = 1000  # Never compact for fewer journal records than this.
+
+
+class Task(Record):
+    """ One task in memory: slots instead of a dict, one shared string per status.
+    Works like the task dict it was made from (see pbl_common/records.py). """
+
+    FIELDS = ("id", "description", "status", "createdAt", "updatedAt")
+    __slots__ = FIELDS
+    INTERNED = frozenset({"status"})
+
+
+# Creating a [helper] path function
+def journal_path(task_file):
+    """Returns the journal file that belongs to a snapshot file."""
+    root, _ = os.path.splitext(task_file)
+    return root + JOURNAL_SUFFIX
+
+
+def meta_path(task_file):
+    """Returns the metadata file that belongs to a snapshot file."""
+    root, _ = os.path.splitext(task_file)
+    return root + META_SUFFIX
+
+
+def lock_path(task_file):
+    """Returns the lock file that belongs to a snapshot file."""
+    root, _ = os.path.splitext(task_file)
+    return root + LOCK_SUFFIX
+
+
+def read_meta(task_file):
+    """Loads the metadata (e.g. the next id to hand out), or an empty dict."""
+    try:
+        with open(meta_path(task_file), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def read_snapshot(task_file):
+    """Loads the snapshot, or an empty list if it doesn't exist yet."""
+    try:
+        return JsonSerializer().load(task_file)
+    except FileNotFoundError:
+        return []
+
+
+def read_journal(task_file):
+    """Returns the records in the journal (a torn last line is cut off, see pbl_common/journal.py)."""
+    return journal.read_records(journal_path(task_file))
+
+
+def read_journal_from(task_file, offset):
+    """The journal records after byte offset, and the offset they end at."""
+    return journal.read_records_from(journal_path(task_file), offset)
+
+
+def flatten_records(records):
+    """Yields one record per change. A batch is stored as one record so it is saved all-or-nothing.
+
+    A bulk change (mark-done 5-900, delete --status done ...) is stored as one record with a list of
+    "ids" and is handed out here as one record per id, so nothing else needs to know about it.
+    """
+    for record in records:
+        if record["op"] == "batch":
+            yield from flatten_records(record["records"])
+        elif "ids" in record:
+            single = {name: value for name, value in record.items() if name != "ids"}
+            for task_id in record["ids"]:
+                yield dict(single, id=task_id)
+        else:
+            yield record
+
+
+def renumber_record(record, new_ids):
+    """A copy of a record with its task ids changed (new_ids: old id -> new id)."""
+    if record["op"] == "batch":
+        return dict(record, records=[renumber_record(inner, new_ids) for inner in record["records"]])
+    if record["op"] == "add":
+        return dict(record, task=dict(record["task"], id=new_ids.get(record["task"]["id"], record["task"]["id"])))
+    if "ids" in record:
+        return dict(record, ids=[new_ids.get(task_id, task_id) for task_id in record["ids"]])
+    return dict(record, id=new_ids.get(record["id"], record["id"]))
+
+
+def apply_record(tasks, record):
+    """Applies one journal record to a dict of id -> task.
+
+    Every record sets a final value, so replaying a record twice is harmless.
+    That is what makes a crash half way through a compaction safe.
+    """
+    op = record["op"]
+    if op == "add":
+        tasks[record["task"]["id"]] = dict(record["task"])
+    elif op == "delete":
+        tasks.pop(record["id"], None)
+    else:
+        task = tasks.get(record["id"])
+        if task is None:
+            return
+        if op == "edit":
+            task["description"] = record["description"]
+        elif op == "status":
+            task["status"] = record["status"]
+        task["updatedAt"] = record["updatedAt"]
+
+
+# Streaming reads - for listing huge files without loading them.
+SEPARATORS = re.compile(r"[\s,]*")  # whitespace and commas between array items
+SORT_KEYS = ("id", "description", "status", "createdAt", "updatedAt")
+
+
+def iter_snapshot(task_file, chunk_size=1 << 16):
+    """Yields the tasks in the snapshot one at a time, reading the file in chunks.
+
+    Only a chunk (plus one task) is in memory at once, so the first task comes out
+    long before a big file has been read.
+    """
+    decoder = json.JSONDecoder()
+    try:
+        f = open(task_file, "r")
+    except FileNotFoundError:
+        return
+    with f:
+        with profiling.phase("open"):
+            buffer = f.read(chunk_size)
+        profiling.count_bytes("read", len(buffer))
+        buffer = buffer.lstrip()
+        if not buffer:
+            return
+        if not buffer.startswith("["):
+            raise ValueError(f"'{task_file}' is not a JSON array of tasks.")
+        position = 1
+        while True:
+            position = SEPARATORS.match(buffer, position).end()
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                task, end = decoder.raw_decode(buffer, position)
+            except ValueError:  # The task continues in the next chunk (or we ran out of chunks).
+                with profiling.phase("open"):
+                    more = f.read(chunk_size)
+                profiling.count_bytes("read", len(more))
+                if not more:
+                    if buffer[position:].strip():
+                        raise
+                    return
+                buffer = buffer[position:] + more
+                position = 0
+                continue
+            yield task
+            position = end
+            if position >= chunk_size:  # Drop what we've already read.
+                buffer = buffer[position:]
+                position = 0
+
+
+def stream_tasks(task_file):
+    """Yields the current tasks (snapshot + journal) in file order without loading the whole snapshot.
+
+    The journal is small (compaction keeps it that way), so it is read first and grouped by id.
+    Each snapshot task then gets its own journal records applied as it streams past.
+    """
+    changes_by_id = {}
+    with file_lock.locked(lock_path(task_file), shared=True):  # Not while another process is appending.
+        records = read_journal(task_file)
+    for record in flatten_records(records):
+        task_id = record["task"]["id"] if record["op"] == "add" else record["id"]
+        changes_by_id.setdefault(task_id, []).append(record)
+
+    for task in iter_snapshot(task_file):
+        changes = changes_by_id.pop(task["id"], None)
+        if changes is None:
+            yield task
+            continue
+        current = {task["id"]: task}
+        for record in changes:
+            apply_record(current, record)
+        yield from current.values()
+
+    ## What's left are tasks that were added after the last compaction.
+    for changes in changes_by_id.values():
+        current = {}
+        for record in changes:
+            apply_record(current, record)
+        yield from current.values()
+
+
+def select_tasks(tasks, status=None, sort=None, offset=0, limit=None):
+    """Filters, sorts and pages an iterable of tasks lazily.
+
+    sort is one of SORT_KEYS, with a '-' in front for newest/largest first.
+    With a limit, only offset + limit tasks are ever kept (heapq top-k instead of a full sort).
+    Without a sort, tasks come out in file order as soon as they are read.
+    """
+    if status is not None:
+        tasks = (task for task in tasks if task["status"] == status)
+    if sort:
+        descending = sort.startswith("-")
+        key_name = sort.lstrip("-")
+        key = lambda task: task[key_name]
+        with profiling.phase("sort"):  # Also pulls (reads and parses) every task from a stream.
+            if limit is None:
+                tasks = sorted(tasks, key=key, reverse=descending)
+            elif descending:
+                tasks = heapq.nlargest(offset + limit, tasks, key=key)
+            else:
+                tasks = heapq.nsmallest(offset + limit, tasks, key=key)
+    stop = None if limit is None else offset + limit
+    return itertools.islice(tasks, offset, stop)
+
+
+def selection_test(selection):
+    """Turns a selection into a test for one task (the status and id parts are left to the caller's indexes).
+
+    selection: {"ranges": [(first, last), ...] or None, "status": ..., "updated_before": ISO time or None,
+                "where": {field: value}} - see task_tracker.parse_selection().
+    """
+    ranges = selection.get("ranges")
+    updated_before = selection.get("updated_before")
+    where = list((selection.get("where") or {}).items())
+    if selection.get("status") is not None:
+        where.append(("status", selection["status"]))
+
+    def matches(task):
+        if ranges is not None and not any(first <= task["id"] <= last for first, last in ranges):
+            return False
+        if updated_before is not None and task["updatedAt"] >= updated_before:  # ISO times sort as strings.
+            return False
+        return all(str(task[name]) == value for name, value in where)
+    return matches
+
+
+def append_records(task_file, records, sync=True):
+    """Appends records to the journal and makes sure they reach the disk (unless sync=False). Returns its new size."""
+    return journal.append_records(journal_path(task_file), records, sync)
+
+
+def write_json_atomic(path, data, indent=4):
+    """Writes JSON to a temporary file and swaps it in, so a crash never leaves half a file."""
+    with profiling.phase("serialize"):
+        text = json.dumps(data, indent=indent, default=plain)
+    write_text_atomic(path, text)
+
+
+def needs_compaction(task_count, journal_records):
+    """Compacts once the journal is a quarter of the task count, so each compaction is paid for by many cheap appends."""
+    return journal_records >= max(MIN_COMPACT_RECORDS, task_count // 4)
+
+
+def compact(task_file, tasks, meta=None):
+    """Folds the journal into a fresh snapshot and empties the journal."""
+    if meta is not None:
+        write_json_atomic(meta_path(task_file), meta)
+    JsonSerializer().save(task_file, tasks.values())
+    ## Only empty the journal once the new snapshot is safely in place.
+    path = journal_path(task_file)
+    if os.path.exists(path):
+        with open(path, "w"):
+            pass
+
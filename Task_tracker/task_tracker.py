@@ -1,47 +1,69 @@
 import sys  # command-line arguments
-import json  # read and write JSON - database
-from datetime import datetime
+import os
+import shlex  # splits batch lines like the shell does
+from datetime import datetime, timedelta
+from task_storage import write_json_atomic, stream_tasks, select_tasks, SORT_KEYS
+from task_repository import TaskRepository  # in-memory index over the tasks (todolist.json + journal)
+from task_sqlite import SqliteTaskRepository  # same thing, stored in todolist.db
+from pbl_common import profiling  # --profile: where a command spends its time
 
 #create constant for filename - if it needs changing, this is the place.
 task_file = "todolist.json"
+## Where the tasks are stored: "json" (todolist.json) or "sqlite" (todolist.db).
+### The TASK_BACKEND environment variable overrides this.
+storage_backend = os.environ.get("TASK_BACKEND", "json")
+## Daemon mode: a background process (task_daemon.py) keeps the tasks loaded and runs the commands.
+### Opt in with TASK_DAEMON=1.
+use_daemon = os.environ.get("TASK_DAEMON", "0") == "1"
+resident_repository = None  # The daemon's warm copy of the tasks. When set, every function uses it.
 
 # Creating a [helper] grouping function
 def print_task_group(title, tasks_in_group):
     """Prints a formatted group of tasks"""
-    print(f"------------------------------ {title.upper()} ------------------------------")
-    if not tasks_in_group:
-        print("No tasks found in this category.")
-    else:
-        tasks_in_group.sort(key=lambda x: x['id']) # Sorts tasks by ID
-        print(f"{'ID':<4} | {'Status':<12} | {'Last Updated':<20} | {'Description'}")
+    with profiling.phase("render"):
+        print(f"------------------------------ {title.upper()} ------------------------------")
+        if not tasks_in_group:
+            print("No tasks found in this category.")
+        else:
+            # Groups arrive sorted by ID from the repository (or the database), so no sorting here.
+            print_task_header()
+
+
+            for task in tasks_in_group:
+                print_task_row(task)
 
+# Creating [helper] row functions
+def print_task_header():
+    print(f"{'ID':<4} | {'Status':<12} | {'Last Updated':<20} | {'Description'}")
+
+def print_task_row(task):
+    updated_time = task['updatedAt'][:16].replace('T', ' ')
+    print(f"{task['id']:<4} | {task['status']:<12} | {updated_time:<20} | {task['description']}")
+
+# Creating a [helper] load function
+def get_repository():
+    """ Loads the tasks into an indexed repository (id lookups, status buckets, id counter). """
+    if resident_repository is not None:
+        return resident_repository
+    if storage_backend.lower() == "sqlite":
+        return SqliteTaskRepository.load(task_file)
+    return TaskRepository.load(task_file)
 
-        for task in tasks_in_group:
-            updated_time = task['updatedAt'][:16].replace('T', ' ')
-            print(f"{task['id']:<4} | {task['status']:<12} | {updated_time:<20} | {task['description']}")
 
 # Creating a [helper] display function
 def get_tasks():
     """ Shows a list of all tasks """
-    try:
-        with open(task_file, "r") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    return get_repository().all()
 
 
 # Creating the display function
 def display_tasks():
     """loads and displays all tasks."""
-    try:
-        with open(task_file, 'r') as f:  # If you find the task, then load the file
-            tasks = json.load(f)
-    except FileNotFoundError:  # otherwise, give me a blank list.
-        tasks = []
-## Create separate lists for each status
-    todo_tasks = [task for task in tasks if task['status'] == 'todo']
-    in_progress_tasks = [task for task in tasks if task['status'] == 'in-progress']
-    done_tasks = [task for task in tasks if task ['status'] == 'done']
+    repository = get_repository()  # Snapshot + journal, or a blank list if there is no file yet.
+## The repository already keeps the ids for each status, so there's no need to filter.
+    todo_tasks = repository.with_status('todo')
+    in_progress_tasks = repository.with_status('in-progress')
+    done_tasks = repository.with_status('done')
 
 ## Call the helper function to print each group.
     print_task_group("To do", todo_tasks)
@@ -52,206 +74,474 @@ def display_tasks():
 
     print("-"*70)
 
+# Creating the filtered list function
+def list_tasks(status=None, sort=None, offset=0, limit=None):
+    """ Prints one page of tasks, streaming them instead of loading everything first.
+
+    Example: list --status todo --limit 50 --offset 100 --sort updatedAt
+    """
+    if resident_repository is not None or storage_backend.lower() == "sqlite":
+        tasks = get_repository().list_tasks(status, sort, offset, limit)  # already in memory / in the database
+    else:
+        tasks = select_tasks(stream_tasks(task_file), status, sort, offset, limit)
+
+    print_task_header()
+    shown = 0
+    with profiling.phase("scan"):
+        for task in tasks:  # Rows are printed as they come, before the rest of the file has been read.
+            with profiling.phase("render"):
+                print_task_row(task)
+            shown += 1
+    if not shown:
+        print("No tasks found.")
+    print("-"*70)
+    return shown
+
+
+# Creating the search function
+def search_tasks(terms: str, status=None):
+    """ Prints the tasks whose description has every term. 'mil' finds 'milk' (prefix matching). """
+    matches = get_repository().search(terms, status)
+    with profiling.phase("render"):
+        print_task_header()
+        for task in matches:
+            print_task_row(task)
+        if not matches:
+            print("No tasks found.")
+        print(f"{len(matches)} match(es)")
+        print("-"*70)
+    return matches
+
+
+# Creating a [helper] option parser for 'list'
+def parse_list_options(options):
+    """ Turns ['--status', 'todo', '--limit', '50'] into a dict for list_tasks(). Returns None if something's wrong. """
+    settings = {"status": None, "sort": None, "offset": 0, "limit": None}
+    if len(options) % 2:
+        print("❌: Every list option needs a value, e.g. --limit 50")
+        return None
+    for name, value in zip(options[::2], options[1::2]):
+        name = name.lower().lstrip("-")
+        if name in ("limit", "offset"):
+            try:
+                settings[name] = int(value)
+            except ValueError:
+                print(f"❌: --{name} must be a number.")
+                return None
+            if settings[name] < 0:
+                print(f"❌: --{name} can't be negative.")
+                return None
+        elif name == "sort":
+            if value.lstrip("-") not in SORT_KEYS:
+                print(f"❌: Can't sort by '{value}'. Choose from: {', '.join(SORT_KEYS)} (add '-' for descending).")
+                return None
+            settings["sort"] = value
+        elif name == "status":
+            settings["status"] = value
+        else:
+            print(f"❌: Unknown list option '--{name}'.")
+            return None
+    return settings
+
+
+# Creating a [helper] selection parser for the bulk commands
+AGE_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+def parse_selection(words, now):
+    """ Turns ['5-900', '--status', 'done', '--older-than', '30d'] into a selection for the bulk commands.
+
+    Ids and ranges: 7  5-900  1-10,20   Options: --where field=value  --status S
+    --updated-before 2025-07-01  --older-than 30d (h, d or w). Returns None if something's wrong.
+    """
+    selection = {"ranges": None, "status": None, "updated_before": None, "where": {}}
+    position = 0
+    while position < len(words):
+        word = words[position]
+        if not word.startswith("--"):
+            try:
+                for part in filter(None, word.split(",")):
+                    first, dash, last = part.partition("-")
+                    first, last = int(first), int(last if dash else first)  # "5-" is a typo, not task 5.
+                    if first > last:
+                        print(f"❌: The range '{part}' is backwards.")
+                        return None
+                    selection["ranges"] = (selection["ranges"] or []) + [(first, last)]
+            except ValueError:
+                print(f"❌: Invalid ID '{word}'. Use a number or a range like 5-900.")
+                return None
+            position += 1
+            continue
+        name = word.lower().lstrip("-")
+        if position + 1 >= len(words):
+            print(f"❌: --{name} needs a value.")
+            return None
+        value = words[position + 1]
+        position += 2
+        if name == "status":
+            selection["status"] = value
+        elif name == "where":
+            field, equals, wanted = value.partition("=")
+            if not equals or field not in SORT_KEYS:
+                print(f"❌: --where needs field=value, with a field from: {', '.join(SORT_KEYS)}.")
+                return None
+            if field == "status":
+                selection["status"] = wanted
+            else:
+                selection["where"][field] = wanted
+        elif name == "updated-before":
+            try:
+                selection["updated_before"] = datetime.fromisoformat(value).isoformat()
+            except ValueError:
+                print("❌: --updated-before needs a date, e.g. 2025-07-01.")
+                return None
+        elif name == "older-than":
+            unit = AGE_UNITS.get(value[-1:].lower())
+            try:
+                amount = float(value[:-1])
+            except ValueError:
+                unit = None
+            if unit is None:
+                print("❌: --older-than needs an age like 30d, 12h or 2w.")
+                return None
+            selection["updated_before"] = (now - timedelta(**{unit: amount})).isoformat()
+        else:
+            print(f"❌: Unknown option '--{name}'.")
+            return None
+    if selection["ranges"] is None and selection["status"] is None and selection["updated_before"] is None \
+            and not selection["where"]:
+        print("❌: Which tasks? Give an ID, a range (5-900) or a filter (--status, --where, --older-than).")
+        return None
+    return selection
+
+
+def is_single_id(words):
+    """ True for the classic one-id form (mark-done 7), which keeps its own messages. """
+    return len(words) == 1 and words[0].isdigit()
+
+
 # Creating the add_task function
-def add_task(description: str):
+def add_task(description: str, repository=None):
     """ Deals with the logic for loading, updating and saving tasks. """
-    # Let's try to load existing tasks from the JSON File.
-    ## Let's create a 'try...except' as a failsafe in case the file doesn't exist yet.
-    try:
-        with open(task_file, "r") as f:  # "r" stands for read-mode.
-            tasks = json.load(f)  # Creates a list in Python.
-    except FileNotFoundError:
-        tasks = []  # If the file isn't found, create an empty list.
-
-    ## ID the new task - new_id
-    ### Find the highest existing ID and +1
-    #### If the task list is empty we'll use +[0]
-    if tasks:
-        new_id = max(task['id'] for task in tasks) + 1
-    else:
-        new_id = 1
-
-    ## Create a dictionary
-    new_task = {
-        "id": new_id,
-        "description": description,
-        "status": "todo",
-        "createdAt": datetime.now().isoformat(),  # format type YYYY-MM-DD HH:MM:SS
-        "updatedAt": datetime.now().isoformat()
-    }
-    ## Let's add the new task to the list.
-    tasks.append(new_task)
-
-    ## Rewrite the file with the updated list.
-    with open(task_file, "w") as f:  ### w = write mode
-        json.dump(tasks, f, indent=4)  ### json.dump converts from .py to .json. // indent=4 was a recommendation I saw.
-    print(f"✅ Task added successfully (Id: {new_id})")
+    # Let's load existing tasks (unless we were given them). No file yet means no tasks.
+    if repository is None:
+        repository = get_repository()
+
+    ## The repository hands out the next id from its stored counter and appends the change to the journal.
+    new_task = repository.add(description)
+    print(f"✅ Task added successfully (Id: {new_task['id']})")
     return True
 
 
 # Creating the delete task function
-def delete_task(task_id: int):
+def delete_task(task_id: int, repository=None):
     """ Deletes a task using its ID. """
     ## Let's load the existing tasks
-    try:
-        with open(task_file, "r") as f:
-            tasks = json.load(f)
-    except FileNotFoundError:
+    if repository is None:
+        repository = get_repository()
+    if not repository:
         print("❌: No tasks found. The task file does not exist.")
         return False
 
-    ## Now let's create a new list without the task to be deleted.
-    tasks_after_deletion = [task for task in tasks if task["id"] != task_id]
-
     ## Is the task actually deleted?
-    if len(tasks) == len(tasks_after_deletion):
+    if repository.delete(task_id) is None:
         print(f"❌: Task with ID {task_id} not found.")
         return False
-    else:  ### Rewrite the list in the file.
-        with open(task_file, 'w') as f:
-            json.dump(tasks_after_deletion, f, indent=4)
+    else:
         print(f"✅ Task with ID {task_id} deleted successfully.")
         return True
 
 
 # Creating the edit function
-def update_description(task_id: int, new_description: str):
+def update_description(task_id: int, new_description: str, repository=None):
     """ Updates a task's description and it's 'updatedAt' timestamp."""
     ## Let's load the existing tasks
-    try:
-        with open(task_file, "r") as f:
-            tasks = json.load(f)
-    except FileNotFoundError:
+    if repository is None:
+        repository = get_repository()
+    if not repository:
         print("❌: No tasks found. The task file does not exist.")
         return False
 
-    ## Let's find the task and update it
-    task_found = False
-    for task in tasks:
-        if task["id"] == task_id:
-            task["description"] = new_description
-            task['updatedAt'] = datetime.now().isoformat()
-            task_found = True
-            break  #After the task is found and updated, break the loop.
-
-    ## Once that's done, save the file or report an error.
-    if task_found:
-        with open(task_file, "w") as f:
-            json.dump(tasks, f, indent=4)
-        print(f"✅ Task with ID {task_id} updated successfully.")
-        return True
-    else:
+    ## Let's find the task and update it, or report an error.
+    if repository.set_description(task_id, new_description) is None:
         print(f"❌: Task with ID {task_id} not found.")
         return False
-def update_status(task_id: int, new_status: str):
+    print(f"✅ Task with ID {task_id} updated successfully.")
+    return True
+def update_status(task_id: int, new_status: str, repository=None):
     """ Finds a task using ID and updates the status. """
-    try:
-        with open(task_file, "r") as f:
-            tasks = json.load(f)
-    except FileNotFoundError:
+    if repository is None:
+        repository = get_repository()
+    if not repository:
         print("❌: No tasks found.")
         return False
 
-    task_found = False
-    for task in tasks:
-        if task["id"] == task_id:
-            task["status"] = new_status
-            task["updatedAt"] = datetime.now().isoformat()
-            task_found = True
-            break
-
-    if task_found:
-        with open(task_file, "w") as f:
-            json.dump(tasks, f, indent=4)
-        print(f"✅ Task {task_id} status updated to '{new_status}'.")
-        return True
-    else:
+    if repository.set_status(task_id, new_status) is None:
         print(f"❌: Task with ID {task_id} not found.")
         return False
+    print(f"✅ Task {task_id} status updated to '{new_status}'.")
+    return True
 
 
-# Main function of the program.
-def main():
-    """Main function that controls the script's flow."""
-    if len(sys.argv) < 2:
-        print("Expected: python task_tracker.py <command> [arguments]")
-        display_tasks()
-        return
-    ## sys.argv is a list of words the user typed.
-    ### If len is >2 then the user didn't type a command.
+# Bulk functions - every matching task in one pass, with one timestamp and one write.
+def update_status_where(selection, new_status: str, repository=None):
+    """ Sets the status of every task the selection matches. """
+    if repository is None:
+        repository = get_repository()
+    changed = repository.set_status_where(selection, new_status)
+    if not changed:
+        print(f"❌: No tasks matched (or they're all '{new_status}' already).")
+        return False
+    print(f"✅ {len(changed)} task(s) updated to '{new_status}'.")
+    return True
 
-    command = sys.argv[1]  # The command is the first word after the script's name.
+
+def delete_where(selection, repository=None):
+    """ Deletes every task the selection matches. """
+    if repository is None:
+        repository = get_repository()
+    deleted = repository.delete_where(selection)
+    if not deleted:
+        print("❌: No tasks matched.")
+        return False
+    print(f"✅ {len(deleted)} task(s) deleted.")
+    return True
+
+
+# Storage maintenance functions
+def compact_tasks():
+    """ Folds the journal back into todolist.json (or tidies up the database). """
+    journal_records = get_repository().compact()
+    print(f"✅ Storage compacted ({journal_records} journal record(s) folded).")
+
+
+def export_to_json(export_file: str):
+    """ Writes all tasks to a plain JSON array file. """
+    tasks = get_repository().all()
+    write_json_atomic(export_file, tasks)
+    print(f"✅ Exported {len(tasks)} task(s) to '{export_file}'.")
+
+
+# Running one command
+def run_command(args, repository=None):
+    """Runs one task command (args[0] is the command). Returns True when a task was changed."""
+    command = args[0]
     action_successful = False
 
     # Structure for commands:
     ## Add command
     if command.lower() == "add":
-        if len(sys.argv) < 3:  ## This checks if they provided a description for the task
+        if len(args) < 2:  ## This checks if they provided a description for the task
             print("❌: Task description is missing!")
             print("Example: python task_tracker.py add 'Buy Milk'")
         else:
-            description = sys.argv[2]  # The description is the [2] word after the script's name.
-            action_successful = add_task(description)
+            description = args[1]  # The description is the [1] word after the command.
+            action_successful = add_task(description, repository)
 
-    ## Delete command
+    ## Delete command - one id, or many: delete 5-900, delete --status done --older-than 30d
     elif command.lower() == "delete":
-        if len(sys.argv) < 3:  ## This checks if they provided a viable ID
+        if len(args) < 2:  ## This checks if they provided a viable ID
             print("❌: Missing Task ID for deleting!")
             print("Example: python task_tracker.py delete [ID]")
+        elif not is_single_id(args[1:]):
+            selection = parse_selection(args[1:], datetime.now())
+            if selection is not None:
+                action_successful = delete_where(selection, repository)
         else:
             try:  ## If the ID is valid, then it can call the function to delete the task.
-                task_id = int(sys.argv[2])
-                action_successful = delete_task(task_id)
+                task_id = int(args[1])
+                action_successful = delete_task(task_id, repository)
             except ValueError:
                 print("❌: Invalid task ID! The ID must be a number.")
 
     ## Edit command
     elif command.lower() == "edit":
-        if len(sys.argv) < 4:  #This assumes the 4th argument is the new description.
+        if len(args) < 3:  #This assumes the 3rd argument is the new description.
             print("❌: Missing arguments for 'edit' command.")
             print("Example: pythong task_tracker.py edit [id] [New Description]")
         else:
             try:
-                task_id = int(sys.argv[2])
-                new_description = sys.argv[3]
-                action_successful = update_description(task_id, new_description)
+                task_id = int(args[1])
+                new_description = args[2]
+                action_successful = update_description(task_id, new_description, repository)
             except ValueError:
                 print("❌: Invalid ID. The ID must be a number.")
 
 
-    ## Mark-in-progress function
-    elif command.lower() == 'mark-in-progress':
-        if len(sys.argv) < 3:
+    ## Mark-in-progress / mark-done functions - one id, or many: mark-done 5-900,
+    ### mark-done --where status=in-progress --updated-before 2025-07-01
+    elif command.lower() in ('mark-in-progress', 'mark-done'):
+        new_status = "done" if command.lower() == 'mark-done' else "in-progress"
+        if len(args) < 2:
             print("❌: Missing task ID.")
+        elif not is_single_id(args[1:]):
+            selection = parse_selection(args[1:], datetime.now())
+            if selection is not None:
+                action_successful = update_status_where(selection, new_status, repository)
         else:
-            try:
-                task_id = int(sys.argv[2])
-                action_successful = update_status(task_id, "in-progress")
-            except ValueError:
-                print("❌: Invalid ID. The ID must be a number.")
-    ## Mark-done function
-    elif command.lower() == 'mark-done':
-        if len(sys.argv) < 3:
-            print("❌: Missing task ID.")
-        else:
-            try:
-                task_id = int(sys.argv[2])
-                action_successful = update_status(task_id, "done")
-            except ValueError:
-                print("❌: Invalid ID. The ID must be a number.")
-
+            action_successful = update_status(int(args[1]), new_status, repository)
 
-    ## Lists command
-    elif command.lower() == "list":
-        display_tasks()
-        return
     ## Unknown command:
     else:
         print(f"❌: Unknown command '{command}'")
 
+    return action_successful
+
+
+# Batch mode - many commands, one load and one save.
+BATCH_COMMANDS = ("add", "delete", "edit", "mark-in-progress", "mark-done")
+
+def run_batch(lines):
+    """Runs one command per line against a single copy of the tasks.
+
+    Nothing is saved unless every line works (all-or-nothing), and then everything is saved in one write.
+    """
+    repository = get_repository()
+    repository.begin_batch()
+    failed_lines = []
+
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):  ## Skip blank lines and comments.
+            continue
+        try:
+            args = shlex.split(line)  ## Same quoting rules as the shell, e.g. add "Buy Milk"
+        except ValueError as error:
+            print(f"[line {line_number}] ❌: {error}")
+            failed_lines.append(line_number)
+            continue
+        if args[0].lower() not in BATCH_COMMANDS:
+            print(f"[line {line_number}] ❌: '{args[0]}' can't be used in a batch.")
+            failed_lines.append(line_number)
+            continue
+
+        print(f"[line {line_number}] ", end="")
+        if not run_command(args, repository):
+            failed_lines.append(line_number)
+
+    if failed_lines:
+        repository.rollback_batch()
+        print(f"❌: {len(failed_lines)} line(s) failed {failed_lines}. Nothing was saved.")
+        return False
+    changes = repository.commit_batch()
+    print(f"✅ Batch saved: {changes} change(s) in one write.")
+    return changes > 0
+
+
+# Creating a [helper] batch input function
+def read_batch_lines(args):
+    """Reads the batch commands from a file, or from stdin if there's no file (or it's '-')."""
+    if len(args) > 1 and args[1] != "-":
+        try:
+            with open(args[1], "r") as f:
+                return f.readlines()
+        except FileNotFoundError:
+            print(f"❌: Batch file '{args[1]}' not found.")
+            return None
+    return sys.stdin.readlines()
+
+
+# Running a command line
+def run_cli(args, show_list=True, batch_lines=None):
+    """Runs a full command line (without the script's name). Used by main() and by the daemon.
+
+    Returns True when a task was changed.
+    """
+    if not args:  ### If there are no args then the user didn't type a command.
+        print("Expected: python task_tracker.py <command> [arguments] [--no-display]")
+        display_tasks()
+        return False
+
+    command = args[0]  # The command is the first word after the script's name.
+
+    ## Lists command - grouped by status, or one filtered page when options are given.
+    if command.lower() == "list":
+        if len(args) == 1:
+            display_tasks()
+        else:
+            settings = parse_list_options(args[1:])
+            if settings is not None:
+                list_tasks(**settings)
+        return False
+
+    ## Search command - search <terms> [--status S]
+    elif command.lower() == "search":
+        terms = list(args[1:])
+        status = None
+        if "--status" in terms:
+            position = terms.index("--status")
+            if position + 1 >= len(terms):
+                print("❌: --status needs a value, e.g. --status todo")
+                return False
+            status = terms[position + 1]
+            del terms[position:position + 2]
+        if not terms:
+            print("❌: What should I search for?")
+            print("Example: python task_tracker.py search milk --status todo")
+        else:
+            search_tasks(" ".join(terms), status)
+        return False
+
+    ## Storage commands
+    elif command.lower() == "compact":
+        compact_tasks()
+        return False
+    elif command.lower() == "export":
+        export_file = args[1] if len(args) > 1 else "todolist_export.json"
+        export_to_json(export_file)
+        return False
+
+    ## Batch command - the lines were already read by read_batch_lines().
+    elif command.lower() == "batch":
+        if batch_lines is None:
+            return False
+        action_successful = run_batch(batch_lines)
+
+    ## Task commands
+    else:
+        action_successful = run_command(args)
+
     # Display the list after a successful action
-    if action_successful:
+    if action_successful and show_list:
         display_tasks()
+    return action_successful
+
+
+# Main function of the program.
+def main():
+    """Main function that controls the script's flow."""
+    ## sys.argv is a list of words the user typed. We skip [0], the script's name.
+    ### --no-display can go anywhere and stops the list being shown after an action.
+    ### --profile[=json] can go anywhere too and reports where the command spent its time (see pbl_common/profiling.py).
+    try:
+        words = profiling.configure_from(sys.argv[1:])
+    except ValueError as error:
+        print(f"❌: {error}")
+        return
+    args = [arg for arg in words if arg != "--no-display"]
+    show_list = len(args) == len(words)
+    command = args[0].lower() if args else ""
+
+    ## Daemon command - runs (or stops) the background process that keeps the tasks loaded.
+    if command == "daemon":
+        import task_daemon
+        if len(args) > 1 and args[1].lower() == "stop":
+            task_daemon.stop_daemon(task_file)
+        else:
+            task_daemon.serve(task_file)
+        return
+
+    with profiling.action(command or "list"):
+        batch_lines = read_batch_lines(args) if command == "batch" else None
+
+        ## In daemon mode, hand the command to the daemon. If it can't be reached, carry on without it.
+        if use_daemon:
+            import task_daemon
+            if command == "export" and len(args) > 1:
+                args[1] = os.path.abspath(args[1])  # The daemon might not share our working directory.
+            if task_daemon.run_through_daemon(task_file, args, show_list, batch_lines):
+                return
+
+        run_cli(args, show_list, batch_lines)
 
 
 # If the script is being run, then call main() function.
@@ -0,0 +1,107 @@
+# concurrent_writers.py
+## Stress test for several processes changing the same tasks at once (Task_tracker, JSON storage).
+## N writer processes share one todolist.json. Half of them work like the CLI (load, change, save,
+## for every command), the other half like the GUI or the daemon (one copy kept in memory, changes
+## saved write-behind every few changes). Every writer adds its own tasks and marks every other one done.
+## Compaction is made to happen often, so writers also have to catch up with each other's snapshots.
+##
+## Afterwards the tasks are loaded once more and checked: every task that was added is there exactly
+## once, with a unique id, and with the status its writer gave it. Exits with 1 if anything was lost.
+##
+## Usage: python concurrent_writers.py [writers, e.g. 8] [changes per writer, e.g. 200]
+import os
+import shutil
+import sys
+import tempfile
+import time
+from multiprocessing import Process
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+TASK_DIR = os.path.join(os.path.dirname(HERE), "Task_tracker")
+DEFAULT_WRITERS = 8
+DEFAULT_CHANGES = 200
+COMPACT_EVERY = 100  # Journal records - low, so compactions happen during the run.
+FLUSH_EVERY = 5  # Changes per save for the write-behind writers.
+
+
+def writer(task_file, number, changes):
+    sys.path.insert(0, TASK_DIR)
+    import task_storage
+    from task_repository import TaskRepository
+    task_storage.MIN_COMPACT_RECORDS = COMPACT_EVERY
+
+    keeps_copy = number % 2 == 1
+    repository = TaskRepository.load(task_file)
+    repository.sync_writes = not keeps_copy
+    added = []
+    for change in range(changes):
+        if not keeps_copy:
+            repository = TaskRepository.load(task_file)  # Like a CLI command: load, change, save.
+        if change % 2 and added:
+            repository.set_status(added[-1]["id"], "done")  # The id may have changed if another writer took it.
+        else:
+            added.append(repository.add(f"writer {number} task {change}"))
+        if keeps_copy and change % FLUSH_EVERY == FLUSH_EVERY - 1:
+            repository.flush()
+    repository.flush()
+
+
+def check(task_file, writers, changes):
+    """Returns a list of problems (empty = nothing was lost)."""
+    from task_repository import TaskRepository
+    tasks = TaskRepository.load(task_file).all()
+    problems = []
+    by_description = {}
+    for task in tasks:
+        by_description.setdefault(task["description"], []).append(task)
+    ids = [task["id"] for task in tasks]
+    if len(ids) != len(set(ids)):
+        problems.append(f"{len(ids) - len(set(ids))} duplicate id(s)")
+    for number in range(writers):
+        for change in range(0, changes, 2):
+            description = f"writer {number} task {change}"
+            found = by_description.get(description, [])
+            if len(found) != 1:
+                problems.append(f"'{description}' is there {len(found)} time(s)")
+                continue
+            expected = "done" if change + 1 < changes else "todo"  # Each add is marked done by the next change.
+            if found[0]["status"] != expected:
+                problems.append(f"'{description}' is '{found[0]['status']}', expected '{expected}'")
+    return problems
+
+
+def main(argv):
+    writers = int(argv[0]) if argv else DEFAULT_WRITERS
+    changes = int(argv[1]) if len(argv) > 1 else DEFAULT_CHANGES
+    sys.path.insert(0, TASK_DIR)
+
+    work_dir = tempfile.mkdtemp(prefix="pbl-writers-")
+    try:
+        task_file = os.path.join(work_dir, "todolist.json")
+        print(f"{writers} writers x {changes} changes on one task file...")
+        start = time.perf_counter()
+        processes = [Process(target=writer, args=(task_file, number, changes)) for number in range(writers)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        seconds = time.perf_counter() - start
+        failed = [process.exitcode for process in processes if process.exitcode]
+        problems = check(task_file, writers, changes)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{writers * changes} changes in {seconds:.2f} s ({writers * changes / seconds:.0f} changes/s)")
+    if failed:
+        problems.append(f"{len(failed)} writer(s) crashed")
+    for problem in problems[:20]:
+        print(f"❌ {problem}")
+    if problems:
+        print(f"❌ {len(problems)} problem(s): changes were lost.")
+        return 1
+    print("✅ Nothing was lost.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,97 @@
+# generate_data.py
+## Makes synthetic todolist.json files / budget_data ledgers of any size for the benchmarks.
+## Tasks are written one at a time and transactions one month at a time, so even 10M records
+## never sit in memory together.
+## Usage: python generate_data.py tasks 100k todolist.json
+##        python generate_data.py budget 1M budget_data.json   (writes the monthly files in budget_data/)
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+from itertools import groupby
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_DIR = os.path.join(ROOT, "Budget Tracker")
+
+WORDS = ["buy", "milk", "call", "mum", "write", "report", "fix", "bike", "clean", "kitchen", "book",
+         "dentist", "pay", "rent", "study", "python", "walk", "dog", "plan", "trip", "email", "boss"]
+STATUSES = ["todo", "in-progress", "done"]
+CATEGORIES = ["Living Expenses", "Groceries", "Transport", "Fun", "Health", "Bills", "Savings", "Gifts"]
+INCOME_DESCRIPTIONS = ["Paycheck", "Bonus", "Cashback", "Refund", "Side job"]
+START = datetime(2020, 1, 1)
+
+
+def parse_size(text):
+    """Turns '1k', '100k', '1M' or '10M' into a number."""
+    text = text.strip()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(text[-1].lower(), 1)
+    return int(float(text.rstrip("kKmM")) * multiplier)
+
+
+def generate_tasks(count, seed=42):
+    """Yields task dictionaries shaped like the ones task_tracker.py writes."""
+    rng = random.Random(seed)
+    for task_id in range(1, count + 1):
+        created = START + timedelta(seconds=task_id * 30)
+        updated = created + timedelta(seconds=rng.randint(0, 86_400 * 30))
+        yield {
+            "id": task_id,
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(2, 6))).capitalize(),
+            "status": rng.choice(STATUSES),
+            "createdAt": created.isoformat(timespec="microseconds"),
+            "updatedAt": updated.isoformat(timespec="microseconds")
+        }
+
+
+def generate_transactions(count, seed=42):
+    """Yields transaction dictionaries shaped like the ones Budget_Tracker.py writes."""
+    rng = random.Random(seed)
+    for number in range(count):
+        date = (START + timedelta(minutes=number * 7)).strftime("%Y-%m-%d %H:%M")
+        if rng.random() < 0.3:
+            yield {"id": number + 1, "date": date, "type": "income", "amount": round(rng.uniform(10, 3000), 2),
+                   "description": rng.choice(INCOME_DESCRIPTIONS)}
+        else:
+            yield {"id": number + 1, "date": date, "type": "expense", "amount": round(rng.uniform(1, 500), 2),
+                   "category": rng.choice(CATEGORIES),
+                   "description": " ".join(rng.choices(WORDS, k=rng.randint(1, 3))).capitalize()}
+
+
+def write_json_array(path, records):
+    """Writes records as a JSON array, one record per line. Returns how many were written."""
+    count = 0
+    with open(path, "w") as f:
+        f.write("[\n")
+        for record in records:
+            if count:
+                f.write(",\n")
+            f.write("    " + json.dumps(record))
+            count += 1
+        f.write("\n]")
+    return count
+
+
+def write_ledger(path, transactions, count):
+    """Writes transactions (in date order) the way the budget tracker stores them: one file per month."""
+    sys.path[:0] = [BUDGET_DIR, ROOT]  # ROOT for pbl_common.
+    from ledger_storage import LedgerStorage, month_of
+    storage = LedgerStorage(path)
+    storage.next_id = count + 1
+    storage.write_partitions(((month, list(group)) for month, group in groupby(transactions, key=month_of)),
+                             replace_all=True)
+    return count
+
+
+def generate(kind, count, path):
+    if kind == "budget":
+        return write_ledger(path, generate_transactions(count), count)
+    return write_json_array(path, generate_tasks(count))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4 or sys.argv[1] not in ("tasks", "budget"):
+        print("Expected: python generate_data.py <tasks|budget> <size, e.g. 100k> <output file>")
+        sys.exit(1)
+    written = generate(sys.argv[1], parse_size(sys.argv[2]), sys.argv[3])
+    print(f"✅ Wrote {written} {sys.argv[1]} record(s) to '{sys.argv[3]}'.")
@@ -0,0 +1,89 @@
+# record_memory.py
+## Memory per record and load time: plain dicts vs the slot records (Task, Transaction, see
+## pbl_common/records.py) that the task daemon and the GUIs keep in memory.
+## For each kind, the same JSON file is loaded twice, in a fresh process each time:
+##   dicts    json.loads - what a command line load keeps
+##   records  json.loads, then every dict turned into a record (what use_records() does; the dicts are dropped)
+## The load is timed once on its own, then repeated under tracemalloc to measure what stays in memory.
+##
+## Usage: python record_memory.py [size, e.g. 100k]
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from generate_data import generate_tasks, generate_transactions, parse_size, write_json_array
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+DEFAULT_SIZE = "100k"
+KINDS = {
+    "tasks": (generate_tasks, os.path.join(ROOT, "Task_tracker"), "task_storage", "Task"),
+    "transactions": (generate_transactions, os.path.join(ROOT, "Budget Tracker"), "Budget_Tracker", "Transaction"),
+}
+
+
+def measure(kind, path, as_records):
+    """Runs in a fresh process: loads path and prints {"bytes": ..., "seconds": ...} as JSON."""
+    import gc
+    import importlib
+    import tracemalloc
+    _, folder, module_name, class_name = KINDS[kind]
+    sys.path.insert(0, folder)
+    record_type = getattr(importlib.import_module(module_name), class_name)
+    with open(path) as f:
+        text = f.read()
+
+    def load():
+        records = json.loads(text)
+        if as_records:
+            records[:] = map(record_type.from_dict, records)
+        return records
+
+    start = time.perf_counter()  # Timed without tracemalloc, which slows allocations down a lot.
+    records = load()
+    seconds = time.perf_counter() - start
+    assert len(records) and isinstance(records[0], record_type) == as_records
+    del records
+    gc.collect()
+    tracemalloc.start()
+    records = load()
+    gc.collect()
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({"bytes": kept, "seconds": seconds}))
+
+
+def run(kind, path, as_records):
+    output = subprocess.run([sys.executable, __file__, "--measure", kind, path, str(int(as_records))],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def main(argv):
+    if argv[:1] == ["--measure"]:
+        measure(argv[1], argv[2], argv[3] == "1")
+        return 0
+    label = argv[0] if argv else DEFAULT_SIZE
+    count = parse_size(label)
+    print(f"{'Records':<24} | {'Per record':>10} | {'Total':>10} | {'Load':>10}")
+    print("-" * 64)
+    with tempfile.TemporaryDirectory(prefix="pbl-records-") as work_dir:
+        for kind, (generate, _, _, _) in KINDS.items():
+            path = os.path.join(work_dir, kind + ".json")
+            write_json_array(path, generate(count))
+            results = {}
+            for as_records in (False, True):
+                result = results[as_records] = run(kind, path, as_records)
+                name = f"{kind} as {'records' if as_records else 'dicts'}"
+                print(f"{name:<24} | {result['bytes'] / count:>8.0f} B | {result['bytes'] / 2**20:>7.1f} MB | "
+                      f"{result['seconds'] * 1000:>7.0f} ms")
+            print(f"{'':<24} | {results[True]['bytes'] / results[False]['bytes']:>9.0%} of the memory, "
+                  f"{results[True]['seconds'] / results[False]['seconds']:.0%} of the load time")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
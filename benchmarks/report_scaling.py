@@ -0,0 +1,57 @@
+# report_scaling.py
+## How the consolidated report (Budget Tracker/ledger_report.py) scales with the number of workers.
+## Makes a folder of single-file ledgers (the slow case: each one is read and added up in full) and
+## times the report with 1, 2, 4, ... workers up to the number of cores.
+##
+## Usage: python report_scaling.py [ledgers, e.g. 8] [size of each, e.g. 100k]
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from generate_data import generate_transactions, parse_size, write_json_array
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BUDGET_DIR = os.path.join(os.path.dirname(HERE), "Budget Tracker")
+DEFAULT_LEDGERS = 8
+DEFAULT_SIZE = "100k"
+
+
+def worker_counts(cores):
+    count = 1
+    while count < cores:
+        yield count
+        count *= 2
+    yield cores
+
+
+def main(argv):
+    ledgers = int(argv[0]) if argv else DEFAULT_LEDGERS
+    label = argv[1] if len(argv) > 1 else DEFAULT_SIZE
+    sys.path.insert(0, BUDGET_DIR)
+    from ledger_report import consolidated_report
+
+    work_dir = tempfile.mkdtemp(prefix="pbl-report-")
+    try:
+        for number in range(ledgers):
+            write_json_array(os.path.join(work_dir, f"account_{number + 1}.json"),
+                             generate_transactions(parse_size(label), seed=number))
+        cores = os.cpu_count() or 1
+        print(f"Consolidated report over {ledgers} ledgers of {label} transactions ({cores} core(s))")
+        print(f"{'Workers':<8} | {'Time':>10} | Speed-up")
+        print("-" * 34)
+        baseline = None
+        for workers in worker_counts(cores):
+            start = time.perf_counter()
+            consolidated_report([work_dir], workers)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(f"{workers:<8} | {seconds * 1000:>7.1f} ms | {baseline / seconds:.2f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
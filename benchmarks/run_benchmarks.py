@@ -0,0 +1,195 @@
+# run_benchmarks.py
+## Times every public operation of both trackers against synthetic data files.
+## Each operation runs in its own fresh process on a fresh copy of the data, and reports:
+##   - wall time of the call
+##   - peak memory (RSS) of the process
+##   - bytes written to disk during the call
+## Results can be saved as a baseline; later runs are compared to it and regressions are flagged.
+##
+## Usage:
+##   python run_benchmarks.py                         (1k and 100k records)
+##   python run_benchmarks.py --sizes 1k,100k,1M,10M  (the big ones take a while!)
+##   python run_benchmarks.py --save-baseline         (store these results as the baseline)
+##   python run_benchmarks.py --repeat 5              (more runs per benchmark = less noise)
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # The repository folder, for pbl_common.
+from generate_data import generate, parse_size
+from pbl_common.profiling import peak_rss_mb
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+TASK_DIR = os.path.join(ROOT, "Task_tracker")
+BUDGET_DIR = os.path.join(ROOT, "Budget Tracker")
+BASELINE_FILE = os.path.join(HERE, "baseline.json")
+
+OPERATIONS = {
+    "tasks": ["add_task", "update_status", "delete_task", "display_tasks"],
+    "budget": ["load_transactions", "save_transactions", "calculate_balance", "view_summary", "cold_balance",
+               "cold_monthly_totals"],
+}
+DATA_FILES = {"tasks": "todolist.json", "budget": "budget_data.json"}
+DEFAULT_SIZES = "1k,100k"
+DEFAULT_REPEAT = 3  # Each benchmark runs this many times; the fastest run counts.
+TOLERANCE = 0.25  # Flag a regression when something is more than 25% worse...
+MIN_DIFFERENCE = 0.002  # ...and at least 2 ms slower (tiny timings are mostly noise).
+
+
+# Measuring helpers
+def bytes_written():
+    """Bytes this process has written so far (Linux), or None where that isn't available."""
+    try:
+        with open("/proc/self/io", "r") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+# The child process: runs exactly one operation
+def run_operation(tracker, operation, size):
+    """Runs one operation in the current directory and returns its measurements."""
+    sink = io.StringIO()  # Printed output is thrown away (and doesn't count as bytes written).
+    if tracker == "tasks":
+        sys.path.insert(0, TASK_DIR)
+        import task_tracker as module
+        middle_id = max(1, size // 2)
+        calls = {
+            "add_task": lambda: module.add_task("Benchmark task"),
+            "update_status": lambda: module.update_status(middle_id, "done"),
+            "delete_task": lambda: module.delete_task(middle_id),
+            "display_tasks": module.display_tasks,
+        }
+    else:
+        sys.path.insert(0, BUDGET_DIR)
+        with redirect_stdout(sink):
+            import Budget_Tracker as module
+        if operation != "load_transactions" and not operation.startswith("cold_"):
+            module.ledger.transactions  # The data is read before the clock starts, so only the operation is timed.
+        calls = {
+            "load_transactions": module.load_transactions,
+            "save_transactions": module.save_transactions,
+            "calculate_balance": module.calculate_balance,
+            "view_summary": module.view_summary,
+            ## From a fresh start with no budget_totals.json: answered from the per-month totals.
+            "cold_balance": module.calculate_balance,
+            "cold_monthly_totals": lambda: module.rollups("month"),
+        }
+
+    written_before = bytes_written()
+    start = time.perf_counter()
+    with redirect_stdout(sink):
+        calls[operation]()
+    wall = time.perf_counter() - start
+    written_after = bytes_written()
+
+    return {
+        "wall": wall,
+        "rss_mb": peak_rss_mb(),
+        "bytes": None if written_before is None else written_after - written_before,
+    }
+
+
+# The parent process: makes the data and runs every operation in a child
+def benchmark(tracker, operation, size, source_dir):
+    """Copies the data to a fresh folder and runs one operation there in a new process."""
+    work_dir = tempfile.mkdtemp(prefix="pbl-bench-")
+    try:
+        shutil.copytree(source_dir, work_dir, dirs_exist_ok=True)
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", tracker, operation, str(size)],
+            cwd=work_dir, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"{tracker}/{operation} failed:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def load_baseline():
+    try:
+        with open(BASELINE_FILE, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def compare(result, baseline):
+    """Returns a short 'vs baseline' note, and whether it's a regression."""
+    if not baseline:
+        return "(no baseline)", False
+    change = (result["wall"] - baseline["wall"]) / baseline["wall"] if baseline["wall"] else 0.0
+    regression = change > TOLERANCE and result["wall"] - baseline["wall"] > MIN_DIFFERENCE
+    note = f"{change:+.0%}"
+    return (f"{note} ⚠️ REGRESSION" if regression else note), regression
+
+
+def format_bytes(count):
+    if count is None:
+        return "n/a"
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def main(argv):
+    sizes_text = DEFAULT_SIZES
+    save_baseline = "--save-baseline" in argv
+    if "--sizes" in argv:
+        sizes_text = argv[argv.index("--sizes") + 1]
+    repeat = int(argv[argv.index("--repeat") + 1]) if "--repeat" in argv else DEFAULT_REPEAT
+    sizes = [(label, parse_size(label)) for label in sizes_text.split(",")]
+    baseline = load_baseline()
+    results = {}
+    regressions = 0
+
+    data_dir = tempfile.mkdtemp(prefix="pbl-bench-data-")
+    try:
+        print(f"{'Benchmark':<34} | {'Wall time':>11} | {'Peak RSS':>9} | {'Written':>9} | vs baseline")
+        print("-" * 85)
+        for label, size in sizes:
+            for tracker, operations in OPERATIONS.items():
+                source_dir = os.path.join(data_dir, f"{tracker}-{label}")
+                os.mkdir(source_dir)
+                generate(tracker, size, os.path.join(source_dir, DATA_FILES[tracker]))
+                for operation in operations:
+                    key = f"{tracker}/{operation}/{label}"
+                    runs = [benchmark(tracker, operation, size, source_dir) for _ in range(repeat)]
+                    result = min(runs, key=lambda run: run["wall"])
+                    results[key] = result
+                    note, regression = compare(result, baseline.get(key))
+                    regressions += regression
+                    rss = "n/a" if result["rss_mb"] is None else f"{result['rss_mb']:.1f} MB"
+                    print(f"{key:<34} | {result['wall'] * 1000:>8.2f} ms | {rss:>9} | "
+                          f"{format_bytes(result['bytes']):>9} | {note}")
+                shutil.rmtree(source_dir)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    if save_baseline:
+        baseline.update(results)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=4)
+        print(f"✅ Baseline saved to '{BASELINE_FILE}'.")
+    if regressions:
+        print(f"❌ {regressions} regression(s) found.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        print(json.dumps(run_operation(sys.argv[2], sys.argv[3], int(sys.argv[4]))))
+    else:
+        sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,84 @@
+# startup_report.py
+## How long the budget tracker takes to start, measured in fresh processes against a synthetic ledger:
+##   - import Budget_Tracker            (should not read the data file at all)
+##   - import + first use of the data   (the one and only parse)
+##   - opening the GUI                  (needs a display; the data file must still be parsed only once)
+##
+## Usage: python startup_report.py [size, e.g. 100k]
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from generate_data import generate, parse_size
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BUDGET_DIR = os.path.join(os.path.dirname(HERE), "Budget Tracker")
+DEFAULT_SIZE = "100k"
+STAGES = ["import", "first_use", "gui"]
+
+
+def measure(stage):
+    """Runs in the child process: measures one startup stage from a cold interpreter."""
+    sys.path.insert(0, BUDGET_DIR)
+    start = time.perf_counter()
+    import Budget_Tracker as logic
+    imported = time.perf_counter() - start
+    result = {"import": imported}
+    if stage == "first_use":
+        logic.ledger.transactions
+        result["ready"] = time.perf_counter() - start
+    elif stage == "gui":
+        import tkinter as tk
+        try:
+            root = tk.Tk()
+        except tk.TclError:
+            return {"skipped": "no display"}
+        root.withdraw()
+        import Budget_Tracker_gui
+        Budget_Tracker_gui.BudgetApp(root)
+        root.update_idletasks()
+        result["ready"] = time.perf_counter() - start
+        root.destroy()
+    result["parses"] = logic.ledger.load_count
+    result["parse"] = logic.ledger.load_seconds
+    return result
+
+
+def run_stage(stage, work_dir):
+    completed = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", stage],
+                               cwd=work_dir, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{stage} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv):
+    label = argv[0] if argv else DEFAULT_SIZE
+    work_dir = tempfile.mkdtemp(prefix="pbl-startup-")
+    try:
+        generate("budget", parse_size(label), os.path.join(work_dir, "budget_data.json"))
+        print(f"Startup with {label} transactions")
+        print(f"{'Stage':<10} | {'Import':>10} | {'Ready':>10} | {'Parse':>10} | Parses")
+        print("-" * 58)
+        for stage in STAGES:
+            result = run_stage(stage, work_dir)
+            if "skipped" in result:
+                print(f"{stage:<10} | skipped ({result['skipped']})")
+                continue
+            ready = result.get("ready", result["import"])
+            print(f"{stage:<10} | {result['import'] * 1000:>7.1f} ms | {ready * 1000:>7.1f} ms | "
+                  f"{result['parse'] * 1000:>7.1f} ms | {result['parses']}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        print(json.dumps(measure(sys.argv[2])))
+    else:
+        sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,4 @@
+# pbl_common
+## Code shared by the Task Tracker and the Budget Tracker.
+## Each tracker puts the repository folder on sys.path (see the top of task_storage.py and
+## Budget_Tracker.py), so this works whichever folder a tracker is started from.
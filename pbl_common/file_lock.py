@@ -0,0 +1,45 @@
+# file_lock.py
+## Advisory locks between processes (fcntl.flock on a small .lock file next to the data).
+## Writers take the lock exclusively, only around "catch up with the file -> append -> (compact)",
+## so it is held for a few milliseconds and parallel writers still get through quickly.
+## Readers take it shared, so they never see a compaction half way through.
+##
+## flock() locks belong to an open file, not to a process: taking the lock again while holding it
+## (even in the same process) waits forever. Code that already holds it must not call locked() again.
+## Systems without fcntl (Windows) get no locking - one writer at a time, as before.
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from pbl_common import profiling
+
+
+@contextmanager
+def locked(path, shared=False):
+    """Holds the lock file at path (created if needed) for the duration of a with block."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        with profiling.phase("lock"):  # Time spent waiting for other processes.
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def sync(path):
+    """Makes sure what was written to path reaches the disk (fsync), e.g. after letting go of its lock."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,99 @@
+# journal.py
+## An append-only file of JSON records, one per line.
+## A change costs one small append instead of rewriting every record; loading replays the lines.
+## Reads go through the parse cache (parse_cache.py), and appends add their records to it.
+import json
+import os
+
+from pbl_common import parse_cache, profiling
+
+
+def read_records(path):
+    """Returns the records in a journal file (an empty list if there is none).
+
+    A crash in the middle of an append can leave half a line at the end of the file.
+    That line is ignored and cut off, so the next append starts on a clean line.
+    """
+    try:
+        return parse_cache.load(path, parse_records, parse_cache.FROZEN)
+    except FileNotFoundError:
+        return []
+
+
+def read_records_from(path, offset):
+    """The records appended to a journal after byte offset, and the offset they end at.
+
+    For catching up with what other processes appended. A torn last line is cut off, as in read_records().
+    """
+    return _parse(path, offset)
+
+
+def parse_records(path):
+    return _parse(path, 0)[0]
+
+
+def _parse(path, offset):
+    records = []
+    good_size = offset
+    try:
+        with profiling.phase("parse"), open(path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):  # Torn write - the record never finished.
+                    break
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    print(f"⚠️ Ignoring damaged journal records after byte {good_size} in '{path}'.")
+                    break
+                good_size += len(line)
+    except FileNotFoundError:
+        return records, 0
+    profiling.count_bytes("read", good_size - offset)
+
+    if os.path.getsize(path) > good_size:
+        with open(path, "r+b") as f:
+            f.truncate(good_size)
+    return records, good_size
+
+
+def append_records(path, records, sync=True):
+    """Appends records to a journal file and makes sure they reach the disk. Returns the new file size.
+
+    sync=False leaves the fsync to the caller (file_lock.sync), e.g. to do it after letting go of a lock.
+    """
+    with profiling.phase("serialize"):
+        data = "".join(json.dumps(record) + "\n" for record in records)
+    try:
+        before = parse_cache.signature(path)
+    except FileNotFoundError:
+        before = None
+    with profiling.phase("write"), open(path, "a") as f:
+        f.write(data)
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+        profiling.count_bytes("written", len(data))
+        size = f.tell()
+    parse_cache.append(path, before, records)
+    return size
+
+
+def drop_before(path, offset):
+    """Removes the first offset bytes of a journal (the records a new snapshot already holds).
+
+    Records appended after offset are kept, so appends can go on while a snapshot is being written.
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            rest = f.read()
+    except FileNotFoundError:
+        return
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(rest)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    parse_cache.forget(path)
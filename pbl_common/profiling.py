@@ -0,0 +1,267 @@
+# profiling.py
+## Optional per-phase timing for both trackers: where does a slow command spend its time?
+## Turn it on with --profile (or --profile=json) on the command line, or PBL_PROFILE=summary / json.
+##
+## The code marks its phases once and the hooks stay in place:
+##     with profiling.phase("parse"):
+##         tasks = json.loads(data)
+##     profiling.count_bytes("read", len(data))
+## While profiling is off, phase() hands back one shared do-nothing context manager and
+## count_bytes() returns straight away, so the hooks cost next to nothing.
+##
+## Counters (count()) are for things that aren't time or bytes, e.g. parse cache hits and misses.
+## Phases: open, parse, scan (filtering, indexing, adding up), sort, serialize, write, render (printing),
+## lock (waiting for another process to let go of a file).
+## A phase inside another one is only counted once: the outer phase is paused while the inner one runs.
+## Work that is streamed (e.g. a JSON snapshot read task by task) counts toward the phase that pulls it.
+## Only the main thread is timed - background loads and compactions run alongside it.
+##
+## Each command (or Budget Tracker menu action) gives one report, written to stderr, or appended to
+## the file in --profile-out=FILE / PBL_PROFILE_OUT:
+##   summary  a small table: time per phase, bytes read and written, peak memory
+##   json     one JSON line per report, easy to collect and compare
+## --profile-dump=PREFIX / PBL_PROFILE_DUMP also runs cProfile and tracemalloc for the whole process and
+## writes PREFIX.prof (python -m pstats PREFIX.prof) and PREFIX.memory.txt (the top allocation sites).
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+MODES = ("summary", "json")
+TOP_ALLOCATIONS = 25
+
+enabled = False
+mode = "summary"
+output_path = None  # None = stderr
+dump_prefix = None
+
+_main_thread = threading.main_thread()
+_stack = []  # [phase name, time it was last started/resumed] for the phases open right now
+_report = None  # The report being filled in: action, start time, phases, bytes
+_profiler = None
+
+
+class _NoPhase:
+    """ What phase() returns while profiling is off. """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NO_PHASE = _NoPhase()
+
+
+class _Phase:
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        now = time.perf_counter()
+        if _stack:  # Pause the outer phase.
+            _charge(_stack[-1], now)
+        _stack.append([self.name, now])
+        return self
+
+    def __exit__(self, *exc_info):
+        now = time.perf_counter()
+        frame = _stack.pop()
+        _charge(frame, now)
+        _report["phases"][frame[0]][1] += 1
+        if _stack:  # Resume the outer one.
+            _stack[-1][1] = now
+        return False
+
+
+def _charge(frame, now):
+    entry = _report["phases"].setdefault(frame[0], [0.0, 0])
+    entry[0] += now - frame[1]
+    frame[1] = now
+
+
+def phase(name):
+    """Times the code in a with block as one phase of the current report."""
+    if not enabled or _report is None or threading.current_thread() is not _main_thread:
+        return NO_PHASE
+    return _Phase(name)
+
+
+def count_bytes(kind, count):
+    """Adds to the bytes 'read' or 'written' of the current report."""
+    if enabled and _report is not None and threading.current_thread() is _main_thread:
+        _report["bytes"][kind] = _report["bytes"].get(kind, 0) + count
+
+
+def count(name, amount=1):
+    """Adds to a counter of the current report (e.g. parse_cache_hits)."""
+    if enabled and _report is not None and threading.current_thread() is _main_thread:
+        _report["counters"][name] = _report["counters"].get(name, 0) + amount
+
+
+# One report per command / menu action
+class _Action:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        global _report
+        _stack.clear()
+        _report = {"action": self.name, "start": time.perf_counter(), "phases": {}, "bytes": {}, "counters": {}}
+        if _tracing():
+            import tracemalloc
+            tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, *exc_info):
+        global _report
+        report, _report = _report, None
+        _stack.clear()
+        emit(finish(report))
+        return False
+
+
+def action(name):
+    """Everything in the with block goes into one report, emitted at the end of it."""
+    if not enabled:
+        return NO_PHASE
+    return _Action(name)
+
+
+def finish(report):
+    """Turns the raw counters into the report that gets written out."""
+    total = time.perf_counter() - report["start"]
+    phases = {name: {"ms": round(seconds * 1000, 3), "calls": calls}
+              for name, (seconds, calls) in sorted(report["phases"].items(), key=lambda item: -item[1][0])}
+    timed = sum(seconds for seconds, _ in report["phases"].values())
+    result = {
+        "action": report["action"],
+        "total_ms": round(total * 1000, 3),
+        "phases": phases,
+        "other_ms": round(max(0.0, total - timed) * 1000, 3),
+        "bytes_read": report["bytes"].get("read", 0),
+        "bytes_written": report["bytes"].get("written", 0),
+        "peak_rss_mb": peak_rss_mb(),
+        "counters": dict(sorted(report["counters"].items())),
+    }
+    if _tracing():
+        import tracemalloc
+        result["python_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    return result
+
+
+def peak_rss_mb():
+    """Peak memory of the process so far in MB (None where the resource module doesn't exist)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)  # bytes on macOS, KB elsewhere
+
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB", "GB"):
+        if count < 1024 or unit == "GB":
+            return f"{count:.0f} {unit}" if unit == "B" else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def summary_lines(result):
+    lines = [f"⏱️ {result['action']}: {result['total_ms']:.2f} ms",
+             f"   {'Phase':<10} | {'Time':>10} | Calls"]
+    for name, entry in result["phases"].items():
+        lines.append(f"   {name:<10} | {entry['ms']:>7.2f} ms | {entry['calls']}")
+    lines.append(f"   {'other':<10} | {result['other_ms']:>7.2f} ms |")
+    memory = "n/a" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.1f} MB"
+    if "python_peak_mb" in result:
+        memory += f" (Python objects: {result['python_peak_mb']:.1f} MB)"
+    lines.append(f"   Read {format_bytes(result['bytes_read'])}, wrote {format_bytes(result['bytes_written'])}, "
+                 f"peak memory {memory}")
+    if result["counters"]:
+        lines.append("   " + ", ".join(f"{name}: {value}" for name, value in result["counters"].items()))
+    return lines
+
+
+def emit(result):
+    text = json.dumps(result) if mode == "json" else "\n".join(summary_lines(result))
+    if output_path is None:
+        print(text, file=sys.stderr)
+    else:
+        with open(output_path, "a") as f:
+            f.write(text + "\n")
+
+
+# Turning it on
+def configure(profile_mode="summary", output=None, dump=None):
+    """Turns profiling on. dump (a file name prefix) also starts cProfile and tracemalloc."""
+    global enabled, mode, output_path, dump_prefix, _profiler
+    if profile_mode not in MODES:
+        raise ValueError(f"Unknown profile mode '{profile_mode}' (expected one of: {', '.join(MODES)}).")
+    enabled, mode, output_path, dump_prefix = True, profile_mode, output, dump
+    if dump and _profiler is None:
+        import cProfile
+        import tracemalloc
+        tracemalloc.start()
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+        atexit.register(write_dumps)
+
+
+def configure_from(args, environ=os.environ):
+    """Reads the --profile options (or the PBL_PROFILE variables) and returns the other arguments.
+
+    --profile / --profile=json   PBL_PROFILE=summary / json
+    --profile-out=FILE           PBL_PROFILE_OUT=FILE
+    --profile-dump=PREFIX        PBL_PROFILE_DUMP=PREFIX
+    """
+    settings = {"mode": environ.get("PBL_PROFILE"), "out": environ.get("PBL_PROFILE_OUT"),
+                "dump": environ.get("PBL_PROFILE_DUMP")}
+    rest = []
+    for arg in args:
+        if arg == "--profile":
+            settings["mode"] = "summary"
+        elif arg.startswith("--profile="):
+            settings["mode"] = arg.split("=", 1)[1]
+        elif arg.startswith("--profile-out="):
+            settings["out"] = arg.split("=", 1)[1]
+        elif arg.startswith("--profile-dump="):
+            settings["dump"] = arg.split("=", 1)[1]
+        else:
+            rest.append(arg)
+    if settings["mode"] in ("1", "true", "yes"):
+        settings["mode"] = "summary"
+    if settings["mode"] and settings["mode"] not in ("0", "false", "no"):
+        configure(settings["mode"], settings["out"], settings["dump"])
+    return rest
+
+
+def _tracing():
+    if dump_prefix is None:
+        return False
+    import tracemalloc
+    return tracemalloc.is_tracing()
+
+
+def write_dumps():
+    """Writes the cProfile stats and the top allocation sites (runs when the process exits)."""
+    import cProfile
+    import tracemalloc
+    _profiler.disable()
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([  # Leave out the profilers' own memory.
+            tracemalloc.Filter(False, cProfile.__file__), tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)])
+        tracemalloc.stop()
+        with open(dump_prefix + ".memory.txt", "w") as f:
+            f.write(f"Top {TOP_ALLOCATIONS} allocation sites (still allocated at exit):\n")
+            for statistic in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"{statistic}\n")
+            f.write(f"\nPython objects at exit: {format_bytes(current)}, peak: {format_bytes(peak)}\n")
+    _profiler.dump_stats(dump_prefix + ".prof")
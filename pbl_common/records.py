@@ -0,0 +1,114 @@
+# records.py
+## Compact in-memory records for tasks and transactions, for the processes that keep a big list
+## in memory for a long time (the task daemon, the GUIs).
+## A plain dict per record costs about 230 bytes before its values, and every value is its own object:
+## each task has its own copy of "todo". A Record instead:
+##   - keeps its fields in __slots__ (88 bytes for five fields)
+##   - shares repeated text (statuses, transaction types, categories) through sys.intern, so a
+##     million "done"s are one string
+## Timestamps stay text: turning them into numbers on every load cost more time than json.loads itself.
+## It still works like a dict: record["status"], .get(), "category" in record, dict(record), == with a dict.
+##
+## Loading still gives plain dicts - converting costs about as much again as parsing, so a command that
+## loads, changes one task and exits doesn't pay for it. A long-running process converts once after
+## loading (use_records() on the task repository or the budget ledger) and keeps the memory.
+## Dicts and records can be mixed freely in one list.
+import sys
+from collections.abc import MutableMapping
+
+_MISSING = object()
+
+
+class Record(MutableMapping):
+    """ A dict-like record with a fixed set of fields. Subclasses set __slots__ = FIELDS and say
+    which fields are INTERNED (repeated text). """
+
+    __slots__ = ()
+    FIELDS = ()
+    INTERNED = frozenset()
+    _layouts = None  # key order -> how to fill a record from a dict with those keys, or None (per subclass)
+
+    def __init__(self, *values, **fields):
+        for name, value in zip(self.FIELDS, values):
+            self[name] = value
+        for name, value in fields.items():
+            self[name] = value
+
+    @classmethod
+    def _layout(cls, keys):
+        """ [(set field, intern or None)] per key, or None if the keys don't fit this record. """
+        if keys != tuple(name for name in cls.FIELDS if name in keys):
+            return None
+        return [(getattr(cls, name).__set__, _intern if name in cls.INTERNED else None)  # The slot itself, no __setitem__.
+                for name in keys]
+
+    @classmethod
+    def from_dict(cls, data):
+        """ data as a record, or data itself if a record can't hold it exactly (other fields, or another order). """
+        if data.__class__ is not dict:
+            return data  # Already a record.
+        layouts = cls.__dict__.get("_layouts")
+        if layouts is None:
+            layouts = cls._layouts = {}
+        keys = tuple(data)
+        layout = layouts.get(keys, _MISSING)
+        if layout is _MISSING:
+            layout = layouts[keys] = cls._layout(keys)
+        if layout is None:
+            return data
+        record = cls.__new__(cls)
+        for (set_field, convert), value in zip(layout, data.values()):
+            set_field(record, value if convert is None else convert(value))
+        return record
+
+    def to_dict(self):
+        """ The plain dict this record was made from (same fields, same order). """
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name, _MISSING)
+            if value is not _MISSING:
+                data[name] = value
+        return data
+
+    def __getitem__(self, name):
+        if name not in self.FIELDS:
+            raise KeyError(name)
+        try:
+            return getattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __setitem__(self, name, value):
+        if name not in self.FIELDS:
+            raise KeyError(f"{self.__class__.__name__} has no field {name!r}")
+        setattr(self, name, _intern(value) if name in self.INTERNED else value)
+
+    def __delitem__(self, name):
+        if name not in self.FIELDS:
+            raise KeyError(name)
+        try:
+            delattr(self, name)
+        except AttributeError:
+            raise KeyError(name) from None
+
+    def __iter__(self):
+        return (name for name in self.FIELDS if hasattr(self, name))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()!r})"
+
+
+def _intern(value):
+    return sys.intern(value) if value.__class__ is str else value
+
+
+def plain(value):
+    """ A record as a plain dict (anything else as it is) - for json.dumps(..., default=plain) and caches. """
+    if value.__class__ is dict:
+        return value
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
@@ -0,0 +1,47 @@
+# serializers.py
+## How the trackers save their records: a pretty-printed JSON array (easy to read, and to import/export).
+##   load(path)     -> list of dicts
+##   save(path, records)
+## load() and save() go through the parse cache (parse_cache.py): loading a file that hasn't changed
+## since it was last loaded or saved in this process hands out a copy instead of parsing it again.
+import json
+import os
+
+from pbl_common import parse_cache, profiling
+from pbl_common.records import plain
+
+
+class JsonSerializer:
+    def __init__(self, indent=4):
+        self.indent = indent
+
+    def load(self, path):
+        return parse_cache.load(path, self.parse, parse_cache.FROZEN)
+
+    def parse(self, path):
+        with profiling.phase("open"):
+            with open(path, "r") as f:
+                data = f.read()
+        profiling.count_bytes("read", len(data))  # Characters - the same as bytes for the ASCII that json.dumps writes.
+        with profiling.phase("parse"):
+            return json.loads(data)
+
+    def save(self, path, records):
+        """Writes to a temporary file and swaps it in, so a crash never leaves half a file."""
+        records = list(map(plain, records))  # Task / Transaction records as the dicts they stand for.
+        with profiling.phase("serialize"):
+            text = json.dumps(records, indent=self.indent)
+        write_text_atomic(path, text)
+        parse_cache.store(path, records, parse_cache.FROZEN)
+
+
+def write_text_atomic(path, text):
+    """Writes text to a temporary file, syncs it and swaps it in: the file is either the old one or the new one."""
+    temp_path = f"{path}.{os.getpid()}.tmp"  # One per process, so two writers never share one.
+    with profiling.phase("write"):
+        with open(temp_path, "w") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    profiling.count_bytes("written", len(text))  # json.dumps only writes ASCII, so characters = bytes.
@@ -0,0 +1,83 @@
+# write_behind.py
+## Saving for a GUI without making a click wait for the disk.
+## The in-memory copy is the one that counts: a click changes it straight away, and a background
+## thread saves the changes once things go quiet. A burst of clicks becomes one save instead of one per click:
+##   - a save starts DEBOUNCE seconds after the last change...
+##   - ...but never later than MAX_DELAY after the first unsaved one, so a steady stream of changes still gets saved.
+## close() saves whatever is left and stops the thread - call it when the window closes.
+##
+## The in-memory copy belongs to the writer thread: change it with submit(function, ...), which runs
+## function there (a SQLite connection can't be shared between threads, and a save never sees half a change).
+## What submit() returns comes back through finished (a queue): poll it from the UI thread.
+import queue
+import threading
+import time
+
+DEBOUNCE = 0.25  # Seconds without a change before saving...
+MAX_DELAY = 2.0  # ...and the longest a change waits while changes keep coming.
+
+_STOP = object()
+
+
+class WriteBehind:
+    """ A background thread that calls save() once after each burst of changes. """
+
+    def __init__(self, save, debounce=DEBOUNCE, max_delay=MAX_DELAY):
+        self.save = save
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.jobs = queue.Queue()
+        self.finished = queue.Queue()  # (on_done, result, error) - for the UI thread to pick up.
+        self.changes = 0  # How many changes were made...
+        self.saves = 0  # ...and how many saves they took.
+        self.thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+        self.thread.start()
+
+    def submit(self, function, *args, on_done=None, change=True):
+        """ Runs function(*args) on the writer thread. change=False for reads, which don't need a save. """
+        self.jobs.put((function, args, on_done, change))
+
+    def close(self, timeout=5.0):
+        """ Saves anything still waiting and stops the thread. """
+        self.jobs.put(_STOP)
+        self.thread.join(timeout)
+
+    def run(self):
+        first_change = last_change = None  # When the unsaved changes started, and the latest one.
+        saved = True  # False after a failed save: its changes are tried again with the next one.
+        while True:
+            timeout = None
+            if first_change is not None:
+                due = min(last_change + self.debounce, first_change + self.max_delay)
+                timeout = max(0.0, due - time.monotonic())
+            try:
+                job = self.jobs.get(timeout=timeout)
+            except queue.Empty:  # Quiet for long enough (or waited long enough) - save.
+                saved = self._save()
+                first_change = last_change = None
+                continue
+            if job is _STOP:
+                if first_change is not None or not saved:
+                    self._save()
+                return
+            function, args, on_done, change = job
+            try:
+                result = function(*args)
+                self.finished.put((on_done, result, None))
+            except Exception as error:
+                self.finished.put((on_done, None, error))
+            if not change:
+                continue
+            self.changes += 1
+            last_change = time.monotonic()
+            if first_change is None:
+                first_change = last_change
+
+    def _save(self):
+        try:
+            self.save()
+        except Exception as error:  # Reported to the UI; the changes stay in memory for the next save.
+            self.finished.put((None, None, error))
+            return False
+        self.saves += 1
+        return True